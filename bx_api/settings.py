@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,7 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    
+    # First, so its timings cover the rest of the stack
+    "core.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -54,10 +56,34 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     'corsheaders.middleware.CorsMiddleware',
+    # After AuthenticationMiddleware: pins users who just wrote to the primary
+    "core.middleware.ReplicaRoutingMiddleware",
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# core.middleware.PerformanceMiddleware: Server-Timing header on every response, Prometheus histograms at
+# /metrics (only for the addresses in METRICS_ALLOWED_IPS, "*" to serve it to anyone), and a warning plus
+# X-Query-Budget-Exceeded header when a request runs more than QUERY_BUDGET queries. A view can set its own
+# `query_budget`.
+SERVER_TIMING = True
+QUERY_BUDGET = 30
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]
+# List requests with filters or ?ordering= are EXPLAINed before they run and refused with a 400 when the
+# planner's cost estimate (MySQL/PostgreSQL units) exceeds this, or on SQLite when the plan sorts a whole table or index
+QUERY_COST_LIMIT = 100000
+
+REST_FRAMEWORK = {
+    # Keyset pagination on (date, id); see core.pagination
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.DateIdCursorPagination",
+    "PAGE_SIZE": 50,
+    # orjson-backed JSON (falls back to DRF's encoder when orjson isn't installed); see core.renderers
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.OrjsonRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
 ROOT_URLCONF = "bx_api.urls"
 
 TEMPLATES = [
@@ -94,6 +120,52 @@ DATABASES = {
     }
 }
 
+# Optional read replica for the heavy read endpoints (analytics, exports, statements) marked with
+# core.db_routers.replica_safe. Users who just wrote read from the primary for REPLICA_STICKY_SECONDS, and
+# results read from the replica are cached for at most REPLICA_CACHE_TIMEOUT seconds.
+if os.environ.get("DB_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.environ["DB_REPLICA_HOST"],
+        "PORT": os.environ.get("DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["core.db_routers.ReplicaRouter"]
+REPLICA_DATABASE = "replica"
+REPLICA_STICKY_SECONDS = 10
+REPLICA_CACHE_TIMEOUT = 60
+
+# Cache
+# Balances, statements and analytics are cached per user under a version key that every write bumps
+# (core.cache_utils), so entries never need a TTL. Local memory is per process; with several workers set
+# CACHE_DIR for a shared file cache or REDIS_URL for Redis (requires the optional redis package).
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+elif os.environ.get("CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ["CACHE_DIR"],
+            "OPTIONS": {"MAX_ENTRIES": 100000},
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "bx-api",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
+USER_CACHE_ALIAS = "default"
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -139,4 +211,48 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Twilio settings
 #TWILIO_ACCOUNT_SID = ''
 #TWILIO_AUTH_TOKEN = ''
-#TWILIO_PHONE_NUMBER = ''
\ No newline at end of file
+#TWILIO_PHONE_NUMBER = ''
+TWILIO_TIMEOUT = 10  # seconds per API call
+TWILIO_MAX_CONCURRENCY = 8  # dispatcher threads, also the size of the pooled HTTPS connection pool
+TWILIO_RATE_LIMIT = 10  # messages per second per process, shared by every SMS batch; None to disable
+
+
+# Bulk transaction ingest (TransactionViewSet.bulk_create); clients may pass ?batch_size= up to the max.
+TRANSACTION_BULK_BATCH_SIZE = 1000
+TRANSACTION_BULK_MAX_BATCH_SIZE = 5000
+
+# Rows fetched per keyset query when streaming CSV/PDF exports.
+EXPORT_CHUNK_SIZE = 2000
+
+# Rendered PDF statements are cached (keyed by user, date range and latest transaction) in this cache alias.
+# Statements are built in memory up to STATEMENT_SPOOL_MAX_MEMORY bytes, then spooled to a temp file.
+STATEMENT_CACHE_ALIAS = "default"
+STATEMENT_CACHE_TIMEOUT = 60 * 60 * 24
+STATEMENT_CACHE_MAX_BYTES = 10 * 1024 * 1024
+STATEMENT_SPOOL_MAX_MEMORY = 5 * 1024 * 1024
+
+# Analytics charts requested with ?render=png|svg are drawn by matplotlib in a pool of worker processes
+# (0 renders in the request thread) and cached by a hash of the plotted series.
+CHART_RENDER_WORKERS = 2
+CHART_RENDER_TIMEOUT = 30  # seconds
+# A render that times out or loses its worker answers 503 with this Retry-After
+CHART_RETRY_AFTER = 5  # seconds
+CHART_CACHE_ALIAS = "default"
+CHART_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+# Notification outbox, drained by `python manage.py process_notifications`.
+# For local benchmarking without network access use
+# EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend" and
+# SMS_BACKEND = "core.sms_backends.LocmemBackend" (or pass --fake-backends).
+SMS_BACKEND = "core.sms_backends.TwilioBackend"
+NOTIFICATION_BATCH_SIZE = 100
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_RETRY_BACKOFF = 30  # seconds, doubled on every failed attempt
+NOTIFICATION_RETRY_BACKOFF_MAX = 3600
+NOTIFICATION_LEASE = 300  # seconds a batch claimed by a `process_notifications` worker is hidden from other workers
+
+# Low-balance alerts are raised by `python manage.py sweep_low_balances --loop` (or one sweep per cron run)
+# rather than on every transaction write; each sweep claims newly crossed users in batches of this size.
+LOW_BALANCE_SWEEP_BATCH_SIZE = 500
+LOW_BALANCE_SWEEP_INTERVAL = 60  # seconds between sweeps with --loop
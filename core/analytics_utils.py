@@ -0,0 +1,119 @@
+from asgiref.sync import sync_to_async
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import Trunc
+from rest_framework.exceptions import ValidationError
+from .visualization_utils import IMAGE_FORMATS, achart_response, chart_response
+
+GRANULARITIES = ('day', 'week', 'month', 'year')
+
+
+def time_series_query(queryset, granularity='day', date_field='date', value_field='amount', count_field=None):
+    # One GROUP BY in SQL: the result has one row per bucket, however many rows fall inside it.
+    # Rollup tables pass count_field so pre-aggregated counts are summed instead of counted.
+    return (
+        queryset.order_by()
+        .annotate(period=Trunc(date_field, granularity, output_field=DateField()))
+        .values('period')
+        .annotate(total=Sum(value_field), count=Sum(count_field) if count_field else Count('pk'))
+        .filter(count__gt=0)
+        .order_by('period')
+    )
+
+
+def time_series(queryset, granularity='day', date_field='date', value_field='amount', count_field=None):
+    buckets = time_series_query(queryset, granularity, date_field, value_field, count_field)
+    return [{'period': row['period'], 'total': row['total'], 'count': row['count']} for row in buckets]
+
+
+async def atime_series(queryset, granularity='day', date_field='date', value_field='amount', count_field=None):
+    buckets = time_series_query(queryset, granularity, date_field, value_field, count_field)
+    return [{'period': row['period'], 'total': row['total'], 'count': row['count']} async for row in buckets]
+
+
+def analytics_params(query_params):
+    granularity = query_params.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        raise ValidationError({'granularity': [f"Must be one of: {', '.join(GRANULARITIES)}."]})
+    user = query_params.get('user')
+    if user is not None and not user.isdigit():
+        raise ValidationError({'user': ["A valid user id is required."]})
+    charts = query_params.get('charts', '').lower() in ('1', 'true', 'yes')
+    return granularity, user, query_params.get('type'), charts
+
+
+def render_params(query_params, kinds=('line', 'bar')):
+    # ?render=png|svg returns a server-rendered image instead of JSON; ?chart= picks which chart
+    image_format = query_params.get('render')
+    if not image_format:
+        return None, None
+    if image_format not in IMAGE_FORMATS:
+        raise ValidationError({'render': [f"Must be one of: {', '.join(IMAGE_FORMATS)}."]})
+    kind = query_params.get('chart', kinds[0])
+    if kind not in kinds:
+        raise ValidationError({'chart': [f"Must be one of: {', '.join(kinds)}."]})
+    return image_format, kind
+
+
+def series_chart_response(request, series, title, image_format, kind):
+    points = [(point['period'], point['total']) for point in series]
+    return chart_response(request, kind, points, title, image_format, 'period', 'total')
+
+
+async def aseries_chart_response(request, series, title, image_format, kind):
+    points = [(point['period'], point['total']) for point in series]
+    return await achart_response(request, kind, points, title, image_format, 'period', 'total')
+
+
+def analytics_queryset(query_params, queryset, type_field):
+    granularity, user, type_value, charts = analytics_params(query_params)
+    if user:
+        queryset = queryset.filter(user_id=user)
+    if type_value:
+        queryset = queryset.filter(**{type_field: type_value})
+    return queryset, granularity, charts
+
+
+def analytics_charts(series, title):
+    from .visualization_utils import generate_bar_chart, generate_line_chart
+    chart_data = [{'period': point['period'], 'total': point['total']} for point in series]
+    return {
+        'bar_chart': generate_bar_chart(chart_data, title, 'period', 'total'),
+        'line_chart': generate_line_chart(chart_data, title, 'period', 'total'),
+    }
+
+
+def build_analytics(query_params, queryset, type_field, title, date_field='date', value_field='amount', count_field=None):
+    queryset, granularity, charts = analytics_queryset(query_params, queryset, type_field)
+    series = time_series(queryset, granularity, date_field, value_field, count_field)
+    data = {'granularity': granularity, 'series': series}
+    if charts:
+        data.update(analytics_charts(series, title))
+    return data
+
+
+async def abuild_analytics(query_params, queryset, type_field, title, date_field='date', value_field='amount', count_field=None):
+    queryset, granularity, charts = analytics_queryset(query_params, queryset, type_field)
+    series = await atime_series(queryset, granularity, date_field, value_field, count_field)
+    data = {'granularity': granularity, 'series': series}
+    if charts:
+        # Plotly figures are CPU-bound, so they are built off the event loop
+        data.update(await sync_to_async(analytics_charts, thread_sensitive=False)(series, title))
+    return data
+
+
+def rollup_totals_query(queryset, key_field):
+    # Totals per type/category over a day range, read from a daily rollup table
+    return (
+        queryset.values(key_field)
+        .annotate(total=Sum('total_amount'), count=Sum('count'))
+        .filter(count__gt=0)
+        .order_by(key_field)
+    )
+
+
+def rollup_totals(queryset, key_field):
+    return list(rollup_totals_query(queryset, key_field))
+
+
+async def arollup_totals(queryset, key_field):
+    return [row async for row in rollup_totals_query(queryset, key_field)]
@@ -0,0 +1,223 @@
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from django.db.models import Sum
+from django.http import JsonResponse
+from django.utils.dateparse import parse_date
+from django.views import View
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from .analytics_utils import abuild_analytics, arollup_totals, aseries_chart_response, render_params
+from .cache_utils import acached_for_user
+from .export_utils import aiterate_values, stream_csv
+from .models import Profile, Transaction, Investment, Budget, DailyTransactionRollup, DailyExpenseRollup
+from .serializers import TransactionSerializer
+from .utils import scoped_user_id
+from .visualization_utils import achart_response
+from .views import StatementView
+
+# ASGI versions of the balance, statement and analytics endpoints. DRF 3.14 has no async views, so these
+# are plain Django async views that authenticate with the DRF classes and answer with the same envelope.
+
+
+def envelope(success=True, message=None, data=None, status=200):
+    return JsonResponse({'success': success, 'message': message, 'data': data}, status=status, encoder=JSONEncoder)
+
+
+def error(detail, status):
+    return JsonResponse({'detail': detail}, status=status, encoder=JSONEncoder)
+
+
+def get_authenticators():
+    return [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+
+
+async def get_user(request):
+    # Session/basic authentication touch the DB, so they run in the sync thread
+    def authenticate():
+        return Request(request, authenticators=get_authenticators()).user
+    return await sync_to_async(authenticate)()
+
+
+class AsyncAPIView(View):
+    async def dispatch(self, request, *args, **kwargs):
+        # Like DRF's perform_authentication, the user is resolved up front; Request also sets it on
+        # the Django request, which lets the replica router check the user's read-your-writes pin
+        try:
+            request.user = await get_user(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return self.handle_exception(request, exc)
+
+    def handle_exception(self, request, exc):
+        # Same responses as DRF's APIView.handle_exception and exception handler: a 401 with a challenge
+        # when the first authenticator has one, otherwise 403; field errors as-is, anything else under 'detail'
+        status = exc.status_code
+        challenge = None
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            authenticators = get_authenticators()
+            challenge = authenticators[0].authenticate_header(request) if authenticators else None
+            if not challenge:
+                status = 403
+        if isinstance(exc.detail, (list, dict)):
+            response = JsonResponse(exc.detail, status=status, encoder=JSONEncoder, safe=False)
+        else:
+            response = error(exc.detail, status)
+        if challenge:
+            response['WWW-Authenticate'] = challenge
+        if getattr(exc, 'wait', None):
+            response['Retry-After'] = '%d' % exc.wait
+        return response
+
+
+class AsyncBalanceView(AsyncAPIView):
+    async def get(self, request):
+        user = request.user
+        if not user.is_authenticated:
+            return envelope(
+                success=True,
+                message="Current balance information is not available for anonymous users.",
+                data={'balance': 0}
+            )
+
+        total_balance = await acached_for_user(
+            'balance',
+            user.pk,
+            {},
+            lambda: Profile.objects.filter(user_id=user.pk).values_list('balance', flat=True).afirst(),
+        )
+        if total_balance is None:
+            return error("Profile does not exist for the user.", 404)
+        return envelope(
+            success=True,
+            message="Current balance retrieved successfully.",
+            data={'balance': total_balance}
+        )
+
+
+class AsyncStatementView(AsyncAPIView):
+    replica_safe = True
+
+    async def get(self, request):
+        start_date_str = request.GET.get('start_date')
+        end_date_str = request.GET.get('end_date')
+        start_date = parse_date(start_date_str) if start_date_str else None
+        end_date = parse_date(end_date_str) if end_date_str else None
+
+        if not start_date or not end_date:
+            return error("Both start date and end date must be provided and be valid ISO format dates.", 400)
+        if start_date > end_date:
+            return error("Start date cannot be after end date.", 400)
+
+        user = request.user
+        if not user.is_authenticated:
+            return error("Authentication credentials were not provided.", 401)
+
+        transactions = Transaction.objects.filter(user=user, date__gte=start_date, date__lt=end_date + timedelta(days=1))
+
+        response_format = request.GET.get('format', 'json')
+        if response_format == 'csv':
+            return self.generate_csv_response(transactions)
+        elif response_format == 'pdf':
+            # reportlab is CPU-bound; the sync view's renderer runs in a thread
+            return await sync_to_async(StatementView().generate_pdf_response)(transactions, user, start_date, end_date)
+
+        async def compute():
+            rows = [transaction async for transaction in transactions]
+            return TransactionSerializer(rows, many=True).data
+
+        data = await acached_for_user('statement', user.pk, {'start_date': start_date, 'end_date': end_date}, compute)
+        return envelope(
+            success=True,
+            message="Account statement retrieved successfully.",
+            data=data
+        )
+
+    def generate_csv_response(self, transactions):
+        type_labels = dict(Transaction.TRANSACTION_TYPES)
+
+        async def rows():
+            async for date, transaction_type, amount, description in aiterate_values(transactions, ['date', 'transaction_type', 'amount', 'description']):
+                yield date, type_labels.get(transaction_type, transaction_type), amount, description
+
+        return stream_csv(['Date', 'Transaction Type', 'Amount', 'Description'], rows(), 'statement.csv')
+
+
+class AsyncTransactionAnalyticsView(AsyncAPIView):
+    replica_safe = True
+
+    async def get(self, request):
+        user_id = scoped_user_id(request.user)
+        rollups = DailyTransactionRollup.objects.all() if user_id is None else DailyTransactionRollup.objects.filter(user_id=user_id)
+        data = await acached_for_user(
+            'transaction-analytics',
+            user_id or request.GET.get('user'),
+            request.GET,
+            lambda: abuild_analytics(
+                request.GET,
+                rollups,
+                'transaction_type',
+                'Transactions Over Time',
+                date_field='day',
+                value_field='total_amount',
+                count_field='count',
+            ),
+        )
+        image_format, kind = render_params(request.GET)
+        if image_format:
+            return await aseries_chart_response(request, data['series'], 'Transactions Over Time', image_format, kind)
+        return envelope(
+            success=True,
+            message="Transaction analytics retrieved successfully.",
+            data=data
+        )
+
+
+class AsyncInvestmentAnalyticsView(AsyncAPIView):
+    replica_safe = True
+
+    async def get(self, request):
+        user_id = scoped_user_id(request.user)
+        investments = Investment.objects.all() if user_id is None else Investment.objects.filter(user_id=user_id)
+        data = await abuild_analytics(request.GET, investments, 'investment_type', 'Investments Over Time')
+        image_format, kind = render_params(request.GET)
+        if image_format:
+            return await aseries_chart_response(request, data['series'], 'Investments Over Time', image_format, kind)
+        return envelope(
+            success=True,
+            message="Investment analytics retrieved successfully.",
+            data=data
+        )
+
+
+class AsyncBudgetAnalyticsView(AsyncAPIView):
+    replica_safe = True
+
+    async def get(self, request):
+        user_id = scoped_user_id(request.user)
+        data = await acached_for_user('budget-analytics', user_id, {}, lambda: self.compute_analytics(user_id))
+        image_format, kind = render_params(request.GET, kinds=('spent', 'budget'))
+        if image_format and kind == 'budget':
+            points = [(row['category'], row['total_amount']) for row in data['budget_by_category']]
+            return await achart_response(request, 'pie', points, 'Budget by Category', image_format)
+        if image_format:
+            points = [(row['category'], row['total']) for row in data['spent_by_category']]
+            return await achart_response(request, 'pie', points, 'Spending by Category', image_format)
+        return envelope(
+            success=True,
+            message="Budget analytics retrieved successfully.",
+            data=data
+        )
+
+    async def compute_analytics(self, user_id):
+        queryset = Budget.objects.all() if user_id is None else Budget.objects.filter(user_id=user_id)
+        rollups = DailyExpenseRollup.objects.all() if user_id is None else DailyExpenseRollup.objects.filter(user_id=user_id)
+        total_budget = (await queryset.aaggregate(total_amount=Sum('amount')))['total_amount']
+        budget_by_category = [row async for row in queryset.values('category').annotate(total_amount=Sum('amount')).order_by('category')]
+        spent_by_category = await arollup_totals(rollups, 'category')
+        return {
+            "total_budget": total_budget,
+            "budget_by_category": budget_by_category,
+            "spent_by_category": spent_by_category
+        }
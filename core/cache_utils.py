@@ -0,0 +1,96 @@
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction as db_transaction
+from .db_routers import replica_cache_timeout
+
+# Version key bumped on every write, for results that span all users (unscoped analytics and exports)
+ALL_USERS = 'all'
+_MISSING = object()
+
+
+def get_cache():
+    return caches[getattr(settings, 'USER_CACHE_ALIAS', 'default')]
+
+
+def _version_key(user_id):
+    return f"user-version:{user_id}"
+
+
+def _fresh_version():
+    # Versions restart from the clock rather than 1 if a key is evicted, so they never reuse an old value
+    return time.time_ns()
+
+
+def user_version(user_id):
+    cache = get_cache()
+    key = _version_key(user_id if user_id is not None else ALL_USERS)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_versions(user_ids):
+    # Invalidates every cached result for these users (and the all-users scope) in O(users)
+    cache = get_cache()
+    for user_id in {*user_ids, ALL_USERS}:
+        key = _version_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_version(), timeout=None)
+
+
+def bump_user_versions_on_commit(user_ids):
+    # Bumping after commit keeps a concurrent reader from caching pre-commit rows under the new version
+    user_ids = set(user_ids)
+    db_transaction.on_commit(lambda: bump_user_versions(user_ids))
+
+
+def cache_key(namespace, user_id, params=None):
+    digest = hashlib.md5(json.dumps(params or {}, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{namespace}:{user_id if user_id is not None else ALL_USERS}:{user_version(user_id)}:{digest}"
+
+
+def cached_for_user(namespace, user_id, params, compute):
+    # Results live until the user's next write bumps the version; no TTL needed unless they were read
+    # from a replica, which may still be behind that write
+    cache = get_cache()
+    key = cache_key(namespace, user_id, params)
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        cache.set(key, value, timeout=replica_cache_timeout(None))
+    return value
+
+
+# Async twins for core.async_views; they build the same keys, so sync and async views share entries
+
+async def auser_version(user_id):
+    cache = get_cache()
+    key = _version_key(user_id if user_id is not None else ALL_USERS)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _fresh_version(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+async def acache_key(namespace, user_id, params=None):
+    digest = hashlib.md5(json.dumps(params or {}, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{namespace}:{user_id if user_id is not None else ALL_USERS}:{await auser_version(user_id)}:{digest}"
+
+
+async def acached_for_user(namespace, user_id, params, compute):
+    # compute is a coroutine function
+    cache = get_cache()
+    key = await acache_key(namespace, user_id, params)
+    value = await cache.aget(key, _MISSING)
+    if value is _MISSING:
+        value = await compute()
+        await cache.aset(key, value, timeout=replica_cache_timeout(None))
+    return value
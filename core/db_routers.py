@@ -0,0 +1,143 @@
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.utils.functional import SimpleLazyObject, empty
+
+# Set by core.middleware.ReplicaRoutingMiddleware for requests to replica-safe views. A ContextVar follows
+# the request into sync_to_async threads, so the async views route the same way.
+_replica_state = ContextVar('replica_state', default=None)
+
+PIN_COOKIE = 'bx_primary'
+
+
+def replica_alias():
+    alias = getattr(settings, 'REPLICA_DATABASE', 'replica')
+    return alias if alias in connections.databases else None
+
+
+def replica_safe(view):
+    # Marks a view method or @action as safe to read from the replica. Views can also set
+    # `replica_safe = True` on the class to cover all of their GET handlers.
+    view.replica_safe = True
+    return view
+
+
+def pin_key(user_id):
+    return f"replica-pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    # Read-your-writes: after a write, this user's reads stay on the primary until replication catches up
+    from .cache_utils import get_cache
+    get_cache().set(pin_key(user_id), True, getattr(settings, 'REPLICA_STICKY_SECONDS', 10))
+
+
+class ReplicaState:
+    def __init__(self, request, alias):
+        self.request = request
+        self.alias = alias
+        self.decided = None
+
+    def use_replica(self):
+        if self.decided is not None:
+            return self.decided
+        user = self.request.__dict__.get('user')
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            # Authentication hasn't resolved the user yet (and may be doing so right now): read the primary
+            # without deciding, rather than evaluating the user from inside the router.
+            return False
+        if user is not None and user.is_authenticated:
+            from .cache_utils import get_cache
+            self.decided = not get_cache().get(pin_key(user.pk))
+        else:
+            self.decided = True
+        return self.decided
+
+
+def is_replica_safe(view_func, request):
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if view_class is None:
+        return getattr(view_func, 'replica_safe', False)
+    actions = getattr(view_func, 'actions', None)
+    method = request.method.lower()
+    handler = getattr(view_class, actions.get(method, method) if actions else method, None)
+    return getattr(handler, 'replica_safe', False) or getattr(view_class, 'replica_safe', False)
+
+
+def begin_request():
+    return _replica_state.set(None)
+
+
+def end_request(token):
+    _replica_state.reset(token)
+
+
+def enter_replica_state(request):
+    alias = replica_alias()
+    if alias is not None:
+        _replica_state.set(ReplicaState(request, alias))
+
+
+def current_replica_state():
+    return _replica_state.get()
+
+
+def with_replica_state(content, state):
+    # Streaming bodies are produced after the middleware returns, so each chunk re-enters the request's state
+    if hasattr(content, '__aiter__'):
+        return _awith_replica_state(content, state)
+    return _with_replica_state(content, state)
+
+
+def _with_replica_state(content, state):
+    iterator = iter(content)
+    while True:
+        token = _replica_state.set(state)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _replica_state.reset(token)
+        yield chunk
+
+
+async def _awith_replica_state(content, state):
+    iterator = content.__aiter__()
+    while True:
+        token = _replica_state.set(state)
+        try:
+            chunk = await iterator.__anext__()
+        except StopAsyncIteration:
+            return
+        finally:
+            _replica_state.reset(token)
+        yield chunk
+
+
+def reading_from_replica():
+    state = _replica_state.get()
+    return state is not None and state.decided is True
+
+
+def replica_cache_timeout(timeout):
+    # Results computed from a lagging replica are only cached briefly, so a stale read can't outlive the lag
+    if not reading_from_replica():
+        return timeout
+    cap = getattr(settings, 'REPLICA_CACHE_TIMEOUT', 60)
+    return cap if timeout is None else min(timeout, cap)
+
+
+class ReplicaRouter:
+    # Writes and ordinary reads go to the primary; reads inside a replica-safe request go to the replica
+    def db_for_read(self, model, **hints):
+        state = _replica_state.get()
+        if state is not None and state.use_replica():
+            return state.alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
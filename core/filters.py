@@ -0,0 +1,88 @@
+from django_filters import rest_framework as django_filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+from .models import Transaction, Investment, Budget, Expense, SavingsGoal
+
+# Per-viewset whitelists of list filters. Every filter is a plain range or IN comparison on a column, so a
+# user's rows are still read along their (user, date) / (user, start_date) index in cursor order and the
+# page query stops after one page. Dates take YYYY-MM-DD, e.g. ?date_after=2024-01-01&date_before=2024-03-31.
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    # ?category=Food,Rent
+    pass
+
+
+class ChoiceInFilter(django_filters.BaseInFilter, django_filters.ChoiceFilter):
+    # ?type=DEPOSIT,PAYMENT, each value checked against the field's choices
+    pass
+
+
+class TransactionFilter(django_filters.FilterSet):
+    amount_min = django_filters.NumberFilter(field_name='amount', lookup_expr='gte')
+    amount_max = django_filters.NumberFilter(field_name='amount', lookup_expr='lte')
+    date = django_filters.DateFromToRangeFilter()
+    type = ChoiceInFilter(field_name='transaction_type', choices=Transaction.TRANSACTION_TYPES)
+
+    class Meta:
+        model = Transaction
+        fields = []
+
+
+class InvestmentFilter(django_filters.FilterSet):
+    amount_min = django_filters.NumberFilter(field_name='amount', lookup_expr='gte')
+    amount_max = django_filters.NumberFilter(field_name='amount', lookup_expr='lte')
+    date = django_filters.DateFromToRangeFilter()
+    type = CharInFilter(field_name='investment_type')
+
+    class Meta:
+        model = Investment
+        fields = []
+
+
+class ExpenseFilter(django_filters.FilterSet):
+    amount_min = django_filters.NumberFilter(field_name='amount', lookup_expr='gte')
+    amount_max = django_filters.NumberFilter(field_name='amount', lookup_expr='lte')
+    date = django_filters.DateFromToRangeFilter()
+    category = CharInFilter()
+
+    class Meta:
+        model = Expense
+        fields = []
+
+
+class BudgetFilter(django_filters.FilterSet):
+    amount_min = django_filters.NumberFilter(field_name='amount', lookup_expr='gte')
+    amount_max = django_filters.NumberFilter(field_name='amount', lookup_expr='lte')
+    start_date = django_filters.DateFromToRangeFilter()
+    end_date = django_filters.DateFromToRangeFilter()
+    category = CharInFilter()
+
+    class Meta:
+        model = Budget
+        fields = []
+
+
+class SavingsGoalFilter(django_filters.FilterSet):
+    target_min = django_filters.NumberFilter(field_name='target_amount', lookup_expr='gte')
+    target_max = django_filters.NumberFilter(field_name='target_amount', lookup_expr='lte')
+    start_date = django_filters.DateFromToRangeFilter()
+    end_date = django_filters.DateFromToRangeFilter()
+
+    class Meta:
+        model = SavingsGoal
+        fields = []
+
+
+class IndexedOrderingFilter(OrderingFilter):
+    # ?ordering=date or ?ordering=-date on one of the view's ordering_fields, which should only list columns
+    # that follow the user column in an index. The cursor paginator pages on that key (core.pagination), so
+    # only one key is accepted, and unknown keys are a 400 rather than silently ignored.
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        valid_fields = [item[0] for item in self.get_valid_fields(queryset, view, {'request': request})]
+        if len(fields) > 1 or fields[0].lstrip('-') not in valid_fields:
+            raise ValidationError({self.ordering_param: [
+                f"Order by one of: {', '.join(valid_fields)} (prefix with - for descending)."
+            ]})
+        return fields
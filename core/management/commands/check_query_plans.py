@@ -0,0 +1,109 @@
+from datetime import timedelta
+from urllib.parse import urlencode
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F, Sum
+from django.utils import timezone
+from django_filters import rest_framework as django_filters
+from rest_framework.test import APIRequestFactory, force_authenticate
+from core.models import Transaction, Investment, Budget, Expense, SavingsGoal
+from core.pagination import DateIdCursorPagination
+from core.plan_utils import full_scans
+from core.search_utils import FullTextSearchFilter
+from core.urls import router
+
+# Every viewset registered on the router is checked through its own get_queryset() and filter_queryset(), with
+# one request per whitelisted filter, per ?ordering= key and for ?q=, so a new filter or viewset is covered
+# without touching this file. Custom actions that build their own queries are listed here instead.
+EXTRA_QUERY_CHECKS = [
+    ("TransactionViewSet.filter_by_date", lambda user_id, start, end: Transaction.objects.filter(user_id=user_id, date__gte=start, date__lte=end)),
+    ("TransactionViewSet.export_csv", lambda user_id, start, end: Transaction.objects.filter(user_id=user_id, date__range=(start, end)).order_by('pk')),
+    ("InvestmentViewSet.filter_by_date", lambda user_id, start, end: Investment.objects.filter(user_id=user_id, date__gte=start, date__lte=end)),
+    ("ExpenseViewSet.filter_by_date", lambda user_id, start, end: Expense.objects.filter(user_id=user_id, date__gte=start.date(), date__lte=end.date())),
+    ("BudgetViewSet.analytics", lambda user_id, start, end: Budget.objects.filter(user_id=user_id).values('category').annotate(total_amount=Sum('amount'))),
+    ("BudgetViewSet.utilization", lambda user_id, start, end: Budget.objects.filter(user_id=user_id, start_date__lte=end.date(), end_date__gte=start.date())),
+    ("SavingsGoalViewSet.active_goals", lambda user_id, start, end: SavingsGoal.objects.filter(user_id=user_id, current_amount__lt=F('target_amount'))),
+]
+
+
+def list_view(viewset, user, params):
+    # The viewset as it handles GET /users/<user>/<prefix>/?<params>, so it is scoped like a nested route
+    request = APIRequestFactory().get('/', params)
+    force_authenticate(request, user)
+    view = viewset(action_map={'get': 'list'}, format_kwarg=None, args=(), kwargs={'user_pk': str(user.pk)})
+    view.request = view.initialize_request(request)
+    return view
+
+
+def sample_params(view, start, end):
+    # The bare list, then one request per filter in the view's filterset, ?ordering= key and ?q=
+    yield {}
+    filterset_class = getattr(view, 'filterset_class', None)
+    for name, filter_ in (filterset_class.base_filters.items() if filterset_class else ()):
+        if isinstance(filter_, django_filters.DateFromToRangeFilter):
+            yield {f'{name}_after': start.date().isoformat(), f'{name}_before': end.date().isoformat()}
+        elif isinstance(filter_, django_filters.ChoiceFilter):
+            yield {name: filter_.extra['choices'][0][0]}
+        elif isinstance(filter_, django_filters.NumberFilter):
+            yield {name: '100'}
+        else:
+            # A value the user actually has, e.g. one of their categories
+            value = view.get_queryset().values_list(filter_.field_name, flat=True).first()
+            if value is not None:
+                yield {name: value}
+    for field in getattr(view, 'ordering_fields', None) or ():
+        yield {'ordering': field}
+        yield {'ordering': f'-{field}'}
+    if FullTextSearchFilter in view.filter_backends:
+        yield {'q': 'coffee shop'}
+
+
+def viewset_queries(user, start, end):
+    # (label, queryset) for the first page of every sample list request on every registered viewset
+    for prefix, viewset, basename in router.registry:
+        for params in sample_params(list_view(viewset, user, {}), start, end):
+            view = list_view(viewset, user, params)
+            queryset = view.filter_queryset(view.get_queryset())
+            paginator = view.paginator
+            if isinstance(paginator, DateIdCursorPagination):
+                field, descending = paginator.get_cursor_ordering(queryset, view)
+                page_size = paginator.get_page_size(view.request) or paginator.max_page_size
+                queryset = queryset.order_by(*paginator.page_ordering(field, descending))[:page_size + 1]
+            label = f"{viewset.__name__}.list"
+            yield (f"{label}?{urlencode(params)}" if params else label), queryset
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the list queries of every registered ViewSet, and the extra action queries, and flag the ones that do full table scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, default=1, help="User id to plug into the per-user queries.")
+        parser.add_argument('--verbose-plans', action='store_true', help="Print the full plan for every query.")
+        parser.add_argument('--fail-on-scan', action='store_true', help="Exit with an error if any query does a full scan (for CI).")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(pk=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist.")
+        vendor = connection.vendor
+        end = timezone.now()
+        start = end - timedelta(days=30)
+        checks = list(viewset_queries(user, start, end))
+        checks += [(label, build(user.pk, start, end)) for label, build in EXTRA_QUERY_CHECKS]
+        flagged = []
+        for label, queryset in checks:
+            plan = queryset.explain(format='json') if vendor == 'mysql' else queryset.explain()
+            scans = full_scans(plan, vendor)
+            if scans:
+                flagged.append(label)
+                self.stdout.write(self.style.WARNING(f"FULL SCAN  {label}: {', '.join(scans)}"))
+            else:
+                self.stdout.write(f"ok         {label}")
+            if options['verbose_plans']:
+                self.stdout.write(plan)
+
+        if flagged and options['fail_on_scan']:
+            raise CommandError(f"{len(flagged)} queries do full table scans: {', '.join(flagged)}")
+        self.stdout.write(self.style.SUCCESS(f"Checked {len(checks)} queries on {vendor}, {len(flagged)} full scans."))
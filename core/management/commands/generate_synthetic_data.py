@@ -0,0 +1,186 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core.cache_utils import bump_user_versions
+from core.models import Profile, Transaction, Investment, Budget, Expense, SavingsGoal
+
+CATEGORIES = ['Food', 'Rent', 'Transport', 'Utilities', 'Entertainment', 'Health', 'Shopping', 'Travel']
+INVESTMENT_TYPES = ['Stocks', 'Bonds', 'ETF', 'Mutual Fund', 'Crypto', 'Real Estate']
+GOAL_NAMES = ['Emergency Fund', 'Vacation', 'New Car', 'House Deposit', 'Wedding', 'Retirement']
+# Counterparties in descriptions, so ?q= search has realistic words to match
+MERCHANTS = [
+    'Corner Grocery', 'City Power', 'Metro Transit', 'Blue Bottle Coffee', 'Payroll Acme Corp', 'Landlord Rent',
+    'Pharmacy Plus', 'Streaming Service', 'Airline Tickets', 'Hardware Store', 'Savings Account', 'Gym Membership',
+]
+# Relative frequency and amount range of each transaction type
+TRANSACTION_MIX = [
+    (Transaction.DEPOSIT, 30, (100, 3000)),
+    (Transaction.WITHDRAWAL, 25, (10, 500)),
+    (Transaction.PAYMENT, 35, (5, 400)),
+    (Transaction.TRANSFER, 10, (20, 1500)),
+]
+
+
+@contextmanager
+def historical_dates(*models):
+    # Transaction/Investment.date are auto_now_add, which would stamp every generated row with "now"
+    fields = [model._meta.get_field('date') for model in models]
+    saved = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, saved):
+            field.auto_now_add = value
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic users and financial data with chunked bulk inserts, for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help="Users (with profiles) to create.")
+        parser.add_argument('--transactions', type=int, default=10000, help="Total transactions, spread randomly across the new users.")
+        parser.add_argument('--expenses', type=int, help="Total expenses (default: half the transactions).")
+        parser.add_argument('--investments', type=int, help="Total investments (default: 3 per user).")
+        parser.add_argument('--budgets', type=int, help="Total budgets (default: 4 per user).")
+        parser.add_argument('--goals', type=int, help="Total savings goals (default: 2 per user).")
+        parser.add_argument('--days', type=int, default=365, help="Spread dated rows over this many past days.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per bulk INSERT.")
+        parser.add_argument('--prefix', default='synthetic', help="Username prefix for the generated users.")
+        parser.add_argument('--password', default='password', help="Password set on every generated user.")
+        parser.add_argument('--seed', type=int, help="Random seed for a reproducible dataset.")
+        parser.add_argument('--skip-derived', action='store_true', help="Don't rebuild balances, rollups and the search index afterwards.")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError("--users must be at least 1.")
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.days = max(options['days'], 1)
+        self.batch_size = options['batch_size']
+        users = options['users']
+        started = time.perf_counter()
+
+        user_ids = self.create_users(users, options['prefix'], options['password'])
+        with historical_dates(Transaction, Investment):
+            self.insert(Transaction, options['transactions'], lambda: self.transaction(user_ids))
+            self.insert(Investment, self.total(options['investments'], users * 3), lambda: self.investment(user_ids))
+        self.insert(Expense, self.total(options['expenses'], options['transactions'] // 2), lambda: self.expense(user_ids))
+        self.insert(Budget, self.total(options['budgets'], users * 4), lambda: self.budget(user_ids))
+        self.insert(SavingsGoal, self.total(options['goals'], users * 2), lambda: self.goal(user_ids))
+
+        # Bulk inserts skip Transaction/Expense.save(), so the materialized balances, rollups and search index are rebuilt
+        if not options['skip_derived']:
+            call_command('reconcile_balances', users=user_ids, verbosity=0, stdout=self.stdout)
+            call_command('rebuild_rollups', users=user_ids, stdout=self.stdout)
+            call_command('rebuild_search_index', users=user_ids, stdout=self.stdout)
+        bump_user_versions(user_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Generated data for {len(user_ids)} users in {time.perf_counter() - started:.1f}s."))
+
+    def total(self, value, default):
+        return default if value is None else value
+
+    def create_users(self, count, prefix, password):
+        # One hash for everyone: PBKDF2 per user would dominate the run
+        password = make_password(password)
+        offset = User.objects.filter(username__startswith=prefix).count()
+        names = [f"{prefix}{offset + n}" for n in range(count)]
+        for start in range(0, count, self.batch_size):
+            User.objects.bulk_create([
+                User(username=name, email=f"{name}@example.com", password=password, date_joined=self.past())
+                for name in names[start:start + self.batch_size]
+            ])
+        # MySQL doesn't return ids from bulk_create, so read them back
+        user_ids = list(User.objects.filter(username__in=names).order_by('pk').values_list('pk', flat=True))
+        # bulk_create doesn't send post_save, so the profiles the signal would create are inserted here
+        Profile.objects.bulk_create([
+            Profile(
+                user_id=user_id,
+                phone_number=f"+1555{user_id:07d}"[:15],
+                email_notifications=self.rng.random() < 0.8,
+                sms_notifications=self.rng.random() < 0.3,
+                low_balance_threshold=Decimal(self.rng.choice([0, 50, 100, 250])),
+            )
+            for user_id in user_ids
+        ], batch_size=self.batch_size)
+        self.stdout.write(f"users: {len(user_ids)}")
+        return user_ids
+
+    def insert(self, model, total, build):
+        label = model._meta.verbose_name_plural
+        started = time.perf_counter()
+        created = 0
+        while created < total:
+            size = min(self.batch_size, total - created)
+            model.objects.bulk_create([build() for _ in range(size)], batch_size=size)
+            created += size
+            if created % (self.batch_size * 20) == 0 and created < total:
+                self.stdout.write(f"{label}: {created}/{total}")
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(f"{label}: {total} in {elapsed:.1f}s ({rate:.0f} rows/s)")
+
+    def past(self):
+        return self.now - timedelta(seconds=self.rng.randrange(self.days * 86400))
+
+    def money(self, low, high):
+        return Decimal(self.rng.uniform(low, high)).quantize(Decimal('0.01'))
+
+    def transaction(self, user_ids):
+        transaction_type, _, (low, high) = self.rng.choices(TRANSACTION_MIX, weights=[mix[1] for mix in TRANSACTION_MIX])[0]
+        return Transaction(
+            user_id=self.rng.choice(user_ids),
+            amount=self.money(low, high),
+            transaction_type=transaction_type,
+            date=self.past(),
+            description=f"{transaction_type.title()} {self.rng.choice(MERCHANTS)} #{self.rng.randrange(100000)}",
+        )
+
+    def investment(self, user_ids):
+        return Investment(
+            user_id=self.rng.choice(user_ids),
+            investment_type=self.rng.choice(INVESTMENT_TYPES),
+            amount=self.money(100, 20000),
+            date=self.past(),
+        )
+
+    def expense(self, user_ids):
+        category = self.rng.choice(CATEGORIES)
+        return Expense(
+            user_id=self.rng.choice(user_ids),
+            category=category,
+            amount=self.money(5, 300),
+            date=timezone.localdate(self.past()),
+            description=f"{category} expense at {self.rng.choice(MERCHANTS)}",
+        )
+
+    def budget(self, user_ids):
+        start = timezone.localdate(self.past()).replace(day=1)
+        return Budget(
+            user_id=self.rng.choice(user_ids),
+            category=self.rng.choice(CATEGORIES),
+            amount=self.money(100, 2000),
+            start_date=start,
+            end_date=start + timedelta(days=self.rng.choice([30, 90, 365])),
+        )
+
+    def goal(self, user_ids):
+        start = timezone.localdate(self.past())
+        target = self.money(500, 50000)
+        return SavingsGoal(
+            user_id=self.rng.choice(user_ids),
+            goal_name=self.rng.choice(GOAL_NAMES),
+            target_amount=target,
+            current_amount=(target * Decimal(self.rng.uniform(0, 1.1))).quantize(Decimal('0.01')),
+            start_date=start,
+            end_date=start + timedelta(days=self.rng.randrange(90, 1500)),
+        )
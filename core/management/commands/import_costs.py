@@ -0,0 +1,95 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Libraries that should only be loaded by the requests that need them (charts, PDFs, SMS)
+HEAVY_MODULES = ['pandas', 'plotly', 'matplotlib', 'reportlab', 'twilio']
+
+# What a worker imports at boot, plus the modules that pull in the heavy libraries on demand
+DEFAULT_MODULES = [
+    'bx_api.urls',
+    'core.views',
+    'core.pdf_utils',
+    'core.twilio_utils',
+    'core.visualization_utils',
+    'pandas',
+    'plotly.express',
+    'reportlab.pdfgen.canvas',
+    'twilio.rest',
+]
+
+# Runs in a fresh interpreter so every measurement is a cold start. django.setup() happens before the
+# clock starts; its own cost is reported on the "django.setup" row.
+PROBE = '''
+import importlib, json, os, sys, time
+
+def rss():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+module = sys.argv[1]
+import django
+if module != 'django.setup':
+    django.setup()
+before = rss()
+started = time.perf_counter()
+if module == 'django.setup':
+    django.setup()
+else:
+    importlib.import_module(module)
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    'seconds': elapsed,
+    'rss': rss() - before,
+    'heavy': [name for name in sys.argv[2:] if name in sys.modules],
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = "Measure cold-start import time and memory per module, and which heavy libraries each one drags in."
+
+    def add_arguments(self, parser):
+        parser.add_argument('modules', nargs='*', help="Modules to measure (default: worker boot modules and the heavy libraries).")
+        parser.add_argument('--repeat', type=int, default=3, help="Fresh interpreters per module; the median is reported.")
+        parser.add_argument('--fail-on-heavy', action='store_true', help="Exit with an error if bx_api.urls loads a heavy library at boot (for CI).")
+
+    def handle(self, *args, **options):
+        modules = ['django.setup'] + (options['modules'] or DEFAULT_MODULES)
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE, PYTHONPATH=os.pathsep.join(filter(None, sys.path)))
+
+        self.stdout.write(f"{'module':<28} {'import ms':>10} {'rss MB':>8}  heavy libraries loaded")
+        boot_heavy = []
+        for module in modules:
+            runs = [self.probe(module, env) for _ in range(max(options['repeat'], 1))]
+            seconds = statistics.median(run['seconds'] for run in runs)
+            rss = statistics.median(run['rss'] for run in runs)
+            heavy = runs[0]['heavy']
+            if module == 'bx_api.urls':
+                boot_heavy = heavy
+            line = f"{module:<28} {seconds * 1000:>10.1f} {rss / 1048576:>8.1f}  {', '.join(heavy) or '-'}"
+            self.stdout.write(self.style.WARNING(line) if heavy and module.startswith(('bx_api', 'core')) else line)
+
+        if boot_heavy and options['fail_on_heavy']:
+            raise CommandError(f"Worker boot imports heavy libraries: {', '.join(boot_heavy)}")
+
+    def probe(self, module, env):
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE, module] + HEAVY_MODULES,
+            env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Importing {module} failed:\n{result.stderr.strip()}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
@@ -0,0 +1,52 @@
+import asyncio
+import time
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from core.notifications import aprocess_notification_batch, process_notification_batch
+
+
+class Command(BaseCommand):
+    help = "Drain the Notification outbox, sending pending email/SMS in batches with retries and backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Notifications claimed per batch (default NOTIFICATION_BATCH_SIZE).")
+        parser.add_argument('--max-attempts', type=int, help="Attempts before a notification is marked FAILED (default NOTIFICATION_MAX_ATTEMPTS).")
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of exiting once the outbox is empty.")
+        parser.add_argument('--sleep', type=float, default=1.0, help="Seconds to wait between polls when the outbox is empty.")
+        parser.add_argument('--async', dest='use_async', action='store_true', help="Send each batch from an event loop (email in a thread, SMS over aiohttp).")
+        parser.add_argument('--fake-backends', action='store_true', help="Deliver to the in-memory email/SMS backends (benchmarking without network access).")
+
+    def handle(self, *args, **options):
+        if options['fake_backends']:
+            with override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                SMS_BACKEND='core.sms_backends.LocmemBackend',
+            ):
+                return self.drain(options)
+        return self.drain(options)
+
+    def drain(self, options):
+        totals = {'processed': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+        started = time.perf_counter()
+        try:
+            while True:
+                if options['use_async']:
+                    stats = asyncio.run(aprocess_notification_batch(options['batch_size'], options['max_attempts']))
+                else:
+                    stats = process_notification_batch(options['batch_size'], options['max_attempts'])
+                for key in totals:
+                    totals[key] += stats[key]
+                if stats['processed']:
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+
+        elapsed = time.perf_counter() - started
+        rate = totals['processed'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {totals['processed']} notifications in {elapsed:.2f}s ({rate:.0f}/s): "
+            f"{totals['sent']} sent, {totals['retried']} scheduled for retry, {totals['failed']} failed."
+        ))
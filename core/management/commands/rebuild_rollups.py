@@ -0,0 +1,69 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from core.cache_utils import bump_user_versions_on_commit
+from core.models import Transaction, Expense, DailyTransactionRollup, DailyExpenseRollup
+
+ROLLUPS = {
+    'transactions': (Transaction, DailyTransactionRollup, 'transaction_type', TruncDate('date')),
+    'expenses': (Expense, DailyExpenseRollup, 'category', F('date')),
+}
+
+
+class Command(BaseCommand):
+    help = "Backfill or repair the daily transaction/expense rollup tables from the raw rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help="Only rebuild this user id (repeatable).")
+        parser.add_argument('--only', choices=sorted(ROLLUPS), help="Only rebuild one rollup table.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Users rebuilt per database transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Report users whose rollups drifted without writing.")
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['users']:
+            users = users.filter(pk__in=options['users'])
+        user_ids = list(users.values_list('pk', flat=True))
+        names = [options['only']] if options['only'] else sorted(ROLLUPS)
+
+        for name in names:
+            drifted = 0
+            for start in range(0, len(user_ids), options['batch_size']):
+                batch = user_ids[start:start + options['batch_size']]
+                with db_transaction.atomic():
+                    drifted += self.rebuild(name, batch, options['dry_run'])
+            verb = "drifted" if options['dry_run'] else "repaired"
+            self.stdout.write(self.style.SUCCESS(f"{name}: checked {len(user_ids)} users, {drifted} {verb}."))
+
+    def rebuild(self, name, user_ids, dry_run):
+        source, rollup, key_field, day = ROLLUPS[name]
+        expected = {
+            (row['user_id'], row['day'], row[key_field]): (row['total_amount'], row['count'])
+            for row in source.objects.filter(user_id__in=user_ids)
+            .annotate(day=day)
+            .values('user_id', 'day', key_field)
+            .annotate(total_amount=Sum('amount'), count=Count('pk'))
+            .order_by()
+        }
+        stored = {
+            (row['user_id'], row['day'], row[key_field]): (row['total_amount'], row['count'])
+            for row in rollup.objects.select_for_update().filter(user_id__in=user_ids, count__gt=0)
+            .values('user_id', 'day', key_field, 'total_amount', 'count')
+        }
+        drifted = {key[0] for key in expected.keys() ^ stored.keys()}
+        drifted |= {key[0] for key, value in expected.items() if key in stored and stored[key] != value}
+        if drifted and not dry_run:
+            rollup.objects.filter(user_id__in=drifted).delete()
+            rollup.objects.bulk_create(
+                [
+                    rollup(user_id=user_id, day=day, total_amount=total, count=count, **{key_field: key})
+                    for (user_id, day, key), (total, count) in expected.items()
+                    if user_id in drifted
+                ],
+                batch_size=1000,
+            )
+            # Cached analytics and statements have no TTL, so drop the repaired users' entries
+            bump_user_versions_on_commit(drifted)
+        return len(drifted)
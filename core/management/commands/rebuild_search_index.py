@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from core.models import Transaction, Expense, SearchTerm, index_search_documents, uses_search_index
+
+SOURCES = {
+    'transactions': (Transaction, SearchTerm.TRANSACTION),
+    'expenses': (Expense, SearchTerm.EXPENSE),
+}
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SearchTerm inverted index behind ?q= search on databases without FULLTEXT."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help="Only rebuild this user id (repeatable).")
+        parser.add_argument('--only', choices=sorted(SOURCES), help="Only rebuild one source.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows reindexed per database transaction.")
+
+    def handle(self, *args, **options):
+        if not uses_search_index():
+            self.stdout.write(self.style.SUCCESS("MySQL keeps its FULLTEXT indexes current; nothing to rebuild."))
+            return
+        batch_size = options['batch_size']
+        names = [options['only']] if options['only'] else sorted(SOURCES)
+
+        for name in names:
+            model, source = SOURCES[name]
+            documents = model.objects.order_by('pk').only('pk', 'user_id', 'description')
+            terms = SearchTerm.objects.filter(source=source)
+            if options['users']:
+                documents = documents.filter(user_id__in=options['users'])
+                terms = terms.filter(user_id__in=options['users'])
+            # Terms of rows that no longer exist (or were moved to another user) go with the full delete
+            terms.delete()
+
+            indexed, last_pk = 0, 0
+            while True:
+                batch = list(documents.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                with db_transaction.atomic():
+                    index_search_documents(source, batch, batch_size=batch_size)
+                indexed += len(batch)
+                last_pk = batch[-1].pk
+            self.stdout.write(self.style.SUCCESS(f"{name}: indexed {indexed} rows."))
@@ -0,0 +1,50 @@
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from core.cache_utils import bump_user_versions_on_commit
+from core.models import Profile, Transaction, balance_aggregate
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized Profile.balance column from the Transaction table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help="Only reconcile this user id (repeatable).")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Number of profiles locked and rebuilt per database transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without writing anything.")
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.order_by('user_id')
+        if options['users']:
+            profiles = profiles.filter(user_id__in=options['users'])
+        user_ids = list(profiles.values_list('user_id', flat=True))
+
+        batch_size = options['batch_size']
+        checked = drifted = 0
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            with db_transaction.atomic():
+                locked = list(Profile.objects.select_for_update().filter(user_id__in=batch))
+                totals = dict(
+                    Transaction.objects.filter(user_id__in=batch)
+                    .values('user_id')
+                    .annotate(total=balance_aggregate())
+                    .values_list('user_id', 'total')
+                )
+                changed = []
+                for profile in locked:
+                    expected = totals.get(profile.user_id) or Decimal(0)
+                    if profile.balance != expected:
+                        if options['verbosity']:
+                            self.stdout.write(f"user {profile.user_id}: {profile.balance} -> {expected}")
+                        profile.balance = expected
+                        changed.append(profile)
+                if changed and not options['dry_run']:
+                    Profile.objects.bulk_update(changed, ['balance'])
+                    # Cached balances and analytics have no TTL, so drop the corrected users' entries
+                    bump_user_versions_on_commit(profile.user_id for profile in changed)
+            checked += len(batch)
+            drifted += len(changed)
+
+        verb = "would be corrected" if options['dry_run'] else "corrected"
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} balances, {drifted} {verb}."))
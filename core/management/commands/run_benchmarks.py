@@ -0,0 +1,259 @@
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction as db_transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+from django.urls import URLResolver, reverse
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+from core import urls as core_urls
+from core.models import Transaction
+
+# Query strings that make a route do representative work, keyed by route name or action suffix
+ROUTE_PARAMS = {
+    'statement': lambda start, end: {'start_date': start.isoformat(), 'end_date': end.isoformat()},
+    'filter-by-date': lambda start, end: {'start_date': start.isoformat(), 'end_date': end.isoformat()},
+    'analytics': lambda start, end: {'granularity': 'month'},
+}
+
+# Write routes, by action suffix, and the method they are benchmarked with. Payloads are built from the user's
+# own rows, and every write is rolled back so repeated requests (and later routes) see the same data.
+WRITE_ACTIONS = {
+    'list': 'post',
+    'detail': 'put',
+    'bulk-create': 'post',
+    'bulk-update': 'put',
+    'approve': 'post',
+}
+
+
+def iter_routes(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_routes(pattern.url_patterns)
+        else:
+            yield pattern
+
+
+def get_methods(callback):
+    # DRF viewsets map methods to actions; APIViews and Django views expose handlers
+    if getattr(callback, 'actions', None):
+        return set(callback.actions)
+    view_class = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+    if view_class is None:
+        return {'get'}
+    return {method for method in view_class.http_method_names if hasattr(view_class, method)}
+
+
+def percentile(timings, q):
+    if len(timings) == 1:
+        return timings[0]
+    return statistics.quantiles(timings, n=100, method='inclusive')[q - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every GET route in core/urls.py, plus creates, updates, bulk_create, bulk_update and approve: "
+        "p50/p95/p99 latency, query count and peak memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help="User to authenticate as (default: the user with the most transactions).")
+        parser.add_argument('--requests', type=int, default=20, help="Timed requests per route.")
+        parser.add_argument('--warmup', type=int, default=2, help="Untimed requests per route before measuring.")
+        parser.add_argument('--days', type=int, default=30, help="Date range passed to statement and filter_by_date routes.")
+        parser.add_argument('--cold', action='store_true', help="Clear the caches before every request to measure uncached latency.")
+        parser.add_argument('--only', help="Only benchmark routes whose name contains this string.")
+        parser.add_argument('--bulk-size', type=int, default=100, help="Rows per bulk_create/bulk_update request.")
+        parser.add_argument('--reads-only', action='store_true', help="Skip the write routes.")
+        parser.add_argument('--json', dest='json_path', help="Also write the results to this file as JSON.")
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        end = timezone.localdate()
+        start = end - timedelta(days=options['days'])
+        routes = self.build_routes(user, start, end, options)
+        if not routes:
+            raise CommandError("No routes matched.")
+
+        setup_test_environment()
+        try:
+            # Nothing leaves the machine: mail and SMS go to the in-memory backends
+            with override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                SMS_BACKEND='core.sms_backends.LocmemBackend',
+            ):
+                # A failing route is reported with its status instead of aborting the run
+                client = Client(raise_request_exception=False)
+                client.force_login(user)
+                results = [self.measure(client, route, options) for route in routes]
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(f"{'route':<48} {'status':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>7} {'peak KB':>8}")
+        for row in results:
+            line = (
+                f"{row['name']:<48} {row['status']:>6} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+                f"{row['p99_ms']:>8.1f} {row['queries']:>6}{'!' if row['over_query_budget'] else ' '} {row['peak_kb']:>8.0f}"
+            )
+            self.stdout.write(self.style.WARNING(line) if row['status'] >= 400 or row['over_query_budget'] else line)
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({'user': user.pk, 'vendor': connection.vendor, 'cold': options['cold'], 'results': results}, f, indent=2)
+        over = [row['name'] for row in results if row['over_query_budget']]
+        if over:
+            self.stdout.write(self.style.WARNING(f"Over the query budget (!): {', '.join(over)}"))
+        self.stdout.write(self.style.SUCCESS(f"Benchmarked {len(results)} routes as user {user.pk} on {connection.vendor}."))
+
+    def get_user(self, user_id):
+        if user_id:
+            try:
+                return User.objects.get(pk=user_id)
+            except User.DoesNotExist:
+                raise CommandError(f"User {user_id} does not exist.")
+        busiest = Transaction.objects.values('user_id').annotate(n=Count('pk')).order_by('-n').first()
+        user = User.objects.filter(pk=busiest['user_id']).first() if busiest else User.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError("No users found; run generate_synthetic_data first.")
+        return user
+
+    def build_routes(self, user, start, end, options):
+        # (label, method, url, payload) per route
+        routes, seen = [], set()
+        for pattern in iter_routes(core_urls.urlpatterns):
+            name = pattern.name
+            kwargs_needed = set(pattern.pattern.regex.groupindex)
+            # DefaultRouter also registers every route with a .json/.api format suffix
+            if not name or name in seen or 'format' in kwargs_needed:
+                continue
+            if options['only'] and options['only'] not in name:
+                continue
+            seen.add(name)
+            methods = get_methods(pattern.callback)
+            write = None if options['reads_only'] else self.write_method(name, pattern.callback, methods)
+            if 'get' not in methods and write is None:
+                continue
+            kwargs = self.route_kwargs(pattern.callback, kwargs_needed, user)
+            if kwargs is None:
+                self.stdout.write(self.style.WARNING(f"skipped {name}: no sample object"))
+                continue
+            url = reverse(name, kwargs=kwargs)
+            if 'get' in methods:
+                params = next((build(start, end) for suffix, build in ROUTE_PARAMS.items() if name == suffix or name.endswith(f"-{suffix}")), None)
+                if params:
+                    routes.append((name, 'get', f"{url}?{'&'.join(f'{key}={value}' for key, value in params.items())}", None))
+                else:
+                    routes.append((name, 'get', url, None))
+            if write:
+                payload = self.write_payload(name, pattern.callback.cls, kwargs, user, options['bulk_size'])
+                if payload is None:
+                    self.stdout.write(self.style.WARNING(f"skipped {name} {write.upper()}: no sample rows"))
+                else:
+                    routes.append((f"{name} {write.upper()}", write, url, payload))
+        return routes
+
+    def write_method(self, name, callback, methods):
+        suffix = next((suffix for suffix in WRITE_ACTIONS if name.endswith(f"-{suffix}")), None)
+        if suffix is None or WRITE_ACTIONS[suffix] not in methods:
+            return None
+        if suffix in ('list', 'detail'):
+            # Plain creates and updates only for per-user rows: copying a user or a profile would only hit
+            # unique constraints
+            field = next((field for field in callback.cls.queryset.model._meta.fields if field.name == 'user'), None)
+            if field is None or not field.many_to_one:
+                return None
+        return WRITE_ACTIONS[suffix]
+
+    def write_payload(self, name, view_class, kwargs, user, bulk_size):
+        if name.endswith('-approve'):
+            return {}
+        serializer_class = view_class.serializer_class
+        model = view_class.queryset.model
+        if 'pk' in kwargs:
+            return serializer_class(model.objects.get(pk=kwargs['pk'])).data
+        rows = serializer_class(model.objects.filter(user=user).order_by('-pk')[:bulk_size], many=True).data
+        if not rows:
+            return None
+        if name.endswith('-bulk-update'):
+            return rows
+        # New rows: copies of the user's latest ones
+        rows = [{key: value for key, value in row.items() if key != 'id'} for row in rows]
+        return rows if name.endswith('-bulk-create') else rows[0]
+
+    def route_kwargs(self, callback, kwargs_needed, user):
+        kwargs = {}
+        if 'user_pk' in kwargs_needed:
+            kwargs['user_pk'] = user.pk
+        if 'pk' in kwargs_needed:
+            queryset = getattr(getattr(callback, 'cls', None), 'queryset', None)
+            if queryset is None:
+                return None
+            model = queryset.model
+            if model is User:
+                kwargs['pk'] = user.pk
+            else:
+                pk = model.objects.filter(user=user).order_by('pk').values_list('pk', flat=True).first()
+                if pk is None:
+                    return None
+                kwargs['pk'] = pk
+        return kwargs
+
+    def request(self, client, method, url, payload, cold):
+        if cold:
+            for cache in caches.all():
+                cache.clear()
+        if method == 'get':
+            response = client.get(url)
+        else:
+            # Rolled back, so the commit itself and on_commit work (cache version bumps) aren't measured
+            with db_transaction.atomic():
+                response = getattr(client, method)(url, json.dumps(payload, cls=JSONEncoder), content_type='application/json')
+                db_transaction.set_rollback(True)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    def measure(self, client, route, options):
+        name, method, url, payload = route
+        cold = options['cold']
+        for _ in range(options['warmup']):
+            self.request(client, method, url, payload, cold)
+
+        timings = []
+        for _ in range(max(options['requests'], 1)):
+            started = time.perf_counter()
+            response = self.request(client, method, url, payload, cold)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        # Queries and memory are measured on separate requests so their overhead stays out of the timings.
+        # The query log is a bounded deque, so it is emptied first or a full log would capture nothing.
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            over_budget = self.request(client, method, url, payload, cold).get('X-Query-Budget-Exceeded')
+        tracemalloc.start()
+        try:
+            self.request(client, method, url, payload, cold)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'name': name,
+            'method': method.upper(),
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': percentile(timings, 50),
+            'p95_ms': percentile(timings, 95),
+            'p99_ms': percentile(timings, 99),
+            'queries': len(queries),
+            'over_query_budget': bool(over_budget),
+            'peak_kb': peak / 1024,
+        }
@@ -0,0 +1,29 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.models import sweep_low_balances
+
+
+class Command(BaseCommand):
+    help = "Alert every user who dropped below their low-balance threshold since the last sweep, once per crossing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Profiles flagged and alerts enqueued per transaction (default LOW_BALANCE_SWEEP_BATCH_SIZE).")
+        parser.add_argument('--loop', action='store_true', help="Keep sweeping on a schedule instead of exiting after one sweep.")
+        parser.add_argument('--interval', type=float, help="Seconds between sweeps with --loop (default LOW_BALANCE_SWEEP_INTERVAL).")
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or getattr(settings, 'LOW_BALANCE_SWEEP_INTERVAL', 60)
+        try:
+            while True:
+                started = time.perf_counter()
+                alerted, rearmed = sweep_low_balances(options['batch_size'])
+                elapsed = time.perf_counter() - started
+                self.stdout.write(self.style.SUCCESS(
+                    f"Low-balance sweep: {alerted} users alerted, {rearmed} recovered, in {elapsed:.2f}s."
+                ))
+                if not options['loop']:
+                    break
+                time.sleep(max(interval - elapsed, 0))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,144 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Per-request timings, set by core.middleware.PerformanceMiddleware. A ContextVar follows the request into
+# sync_to_async threads, so queries issued by the async views are counted too.
+_current = ContextVar('request_stats', default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = 'unmatched'
+        self.query_budget = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.timings = {'serializer': 0.0, 'render': 0.0}
+        self.depth = {}
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_stats():
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    # Installed as a DB execute wrapper on every connection; a no-op outside an instrumented request
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+@contextmanager
+def timed(phase):
+    # Only the outermost block of a phase is counted, so nested serializers aren't double-counted
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    depth = stats.depth.get(phase, 0)
+    stats.depth[phase] = depth + 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.depth[phase] = depth
+        if not depth:
+            stats.timings[phase] += time.perf_counter() - started
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}' if pairs else ''
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            return [f"{self.name}{_labels(self.label_names, labels)} {value}" for labels, value in self.values.items()]
+
+
+class Histogram(Counter):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, label_names, buckets):
+        super().__init__(name, documentation, label_names)
+        self.buckets = buckets
+
+    def observe(self, labels, value):
+        with self.lock:
+            state = self.values.get(labels)
+            if state is None:
+                state = self.values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        lines = []
+        with self.lock:
+            for labels, (counts, total, count) in self.values.items():
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, ('le', bound))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, ('le', '+Inf'))} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram('bx_request_duration_seconds', "Total request latency.", ('view', 'method', 'status'), LATENCY_BUCKETS)
+DB_QUERIES = Histogram('bx_db_queries_per_request', "Database queries per request.", ('view',), QUERY_BUCKETS)
+DB_TIME = Histogram('bx_db_duration_seconds', "Time spent in database queries per request.", ('view',), LATENCY_BUCKETS)
+SERIALIZER_TIME = Histogram('bx_serializer_duration_seconds', "Time spent in DRF serializers per request.", ('view',), LATENCY_BUCKETS)
+RENDER_TIME = Histogram('bx_render_duration_seconds', "Time spent rendering the response body per request.", ('view',), LATENCY_BUCKETS)
+QUERY_BUDGET_EXCEEDED = Counter('bx_query_budget_exceeded_total', "Requests that ran more queries than their budget.", ('view',))
+
+REGISTRY = [REQUEST_LATENCY, DB_QUERIES, DB_TIME, SERIALIZER_TIME, RENDER_TIME, QUERY_BUDGET_EXCEEDED]
+
+
+def render_metrics():
+    # Prometheus text exposition format (0.0.4). Values are per process; Prometheus sums across workers.
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
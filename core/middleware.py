@@ -0,0 +1,171 @@
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import FileResponse
+from . import db_routers
+from .metrics import (
+    DB_QUERIES, DB_TIME, QUERY_BUDGET_EXCEEDED, RENDER_TIME, REQUEST_LATENCY, SERIALIZER_TIME,
+    current_stats, end_request, record_query, start_request,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def install_query_timer(sender=None, connection=None, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def view_label(view_func, request):
+    # "TransactionViewSet.export_pdf" for viewset actions, "StatementView.get" for class views
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if view_class is None:
+        return f"{view_func.__module__}.{getattr(view_func, '__name__', type(view_func).__name__)}"
+    actions = getattr(view_func, 'actions', None)
+    method = request.method.lower()
+    return f"{view_class.__name__}.{actions.get(method, method) if actions else method}"
+
+
+class PerformanceMiddleware:
+    # Records query count/time, serializer time, render time and total latency per view, exposes them as a
+    # Server-Timing header and as Prometheus histograms (see core.metrics), and flags requests over the
+    # query budget. Streaming bodies are produced after the response is returned and aren't included.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_timer)
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection=connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats, token = start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats, token = start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, stats)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = current_stats()
+        if stats is not None:
+            if getattr(view_func, 'exclude_from_metrics', False):
+                stats.view = None
+                return
+            stats.view = view_label(view_func, request)
+            view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+            stats.query_budget = getattr(view_class, 'query_budget', None)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook; the post-render callback closes the timer
+        stats = current_stats()
+        if stats is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                stats.timings['render'] += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, stats):
+        total = time.perf_counter() - stats.started
+        serializer, render = stats.timings['serializer'], stats.timings['render']
+        view = stats.view
+        if view is None:
+            return response
+
+        REQUEST_LATENCY.observe((view, request.method, response.status_code), total)
+        DB_QUERIES.observe((view,), stats.queries)
+        DB_TIME.observe((view,), stats.db_time)
+        SERIALIZER_TIME.observe((view,), serializer)
+        RENDER_TIME.observe((view,), render)
+
+        budget = stats.query_budget if stats.query_budget is not None else getattr(settings, 'QUERY_BUDGET', None)
+        if budget is not None and stats.queries > budget:
+            QUERY_BUDGET_EXCEEDED.inc((view,))
+            response['X-Query-Budget-Exceeded'] = f"{stats.queries}/{budget}"
+            logger.warning("Query budget exceeded: %s %s (%s) ran %d queries, budget %d", request.method, request.path, view, stats.queries, budget)
+
+        if getattr(settings, 'SERVER_TIMING', True):
+            app = max(total - stats.db_time - serializer - render, 0)
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+                f'serializer;dur={serializer * 1000:.1f}',
+                f'render;dur={render * 1000:.1f}',
+                f'app;dur={app * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    # Sends the reads of replica-safe views (see core.db_routers.replica_safe) to the replica. After a
+    # successful write the user is pinned to the primary for REPLICA_STICKY_SECONDS, through a cache key
+    # (any auth method) and a cookie (checked before authentication runs).
+    sync_capable = True
+    async_capable = True
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = db_routers.begin_request()
+        try:
+            response = self.get_response(request)
+            return self.finish(request, response)
+        finally:
+            db_routers.end_request(token)
+
+    async def __acall__(self, request):
+        token = db_routers.begin_request()
+        try:
+            response = await self.get_response(request)
+            return self.finish(request, response)
+        finally:
+            db_routers.end_request(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in self.safe_methods
+            and db_routers.PIN_COOKIE not in request.COOKIES
+            and db_routers.is_replica_safe(view_func, request)
+        ):
+            db_routers.enter_replica_state(request)
+
+    def finish(self, request, response):
+        if db_routers.replica_alias() is None:
+            return response
+        state = db_routers.current_replica_state()
+        if state is not None and response.streaming and not isinstance(response, FileResponse):
+            response.streaming_content = db_routers.with_replica_state(response.streaming_content, state)
+        if request.method not in self.safe_methods and response.status_code < 400:
+            sticky = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                db_routers.pin_to_primary(user.pk)
+            response.set_cookie(db_routers.PIN_COOKIE, '1', max_age=sticky, httponly=True, samesite='Lax')
+        return response
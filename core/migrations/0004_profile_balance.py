@@ -0,0 +1,40 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:06
+
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+
+
+def populate_balances(apps, schema_editor):
+    Profile = apps.get_model("core", "Profile")
+    Transaction = apps.get_model("core", "Transaction")
+    totals = (
+        Transaction.objects.values("user_id")
+        .annotate(
+            total=Sum(
+                Case(
+                    When(transaction_type="DEPOSIT", then=F("amount")),
+                    When(transaction_type="WITHDRAWAL", then=-F("amount")),
+                    default=Value(0),
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                )
+            )
+        )
+        .values_list("user_id", "total")
+    )
+    for user_id, total in totals.iterator():
+        Profile.objects.filter(user_id=user_id).update(balance=total or 0)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0003_profile_email_notifications_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="balance",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(populate_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:08
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def mark_existing_sent(apps, schema_editor):
+    # Rows written before the outbox existed were delivered inline by Transaction.save()
+    Notification = apps.get_model("core", "Notification")
+    Notification.objects.update(status="SENT")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0004_profile_balance"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="last_error",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="next_attempt_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("SENT", "Sent"),
+                    ("FAILED", "Failed"),
+                ],
+                default="PENDING",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="subject",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["status", "next_attempt_at"], name="notification_outbox_idx"
+            ),
+        ),
+        migrations.RunPython(mark_existing_sent, migrations.RunPython.noop),
+    ]
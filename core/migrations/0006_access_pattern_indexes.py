@@ -0,0 +1,65 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0005_notification_outbox"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="budget",
+            index=models.Index(
+                fields=["user", "category"], name="budget_user_category_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="budget",
+            index=models.Index(
+                fields=["user", "start_date", "end_date"], name="budget_user_period_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="expense",
+            index=models.Index(fields=["user", "date"], name="expense_user_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="expense",
+            index=models.Index(
+                fields=["user", "category", "date"], name="expense_user_category_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="expense",
+            index=models.Index(fields=["date"], name="expense_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="investment",
+            index=models.Index(
+                fields=["user", "date"], name="investment_user_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="investment",
+            index=models.Index(fields=["date"], name="investment_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "date"], name="transaction_user_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "transaction_type", "date"],
+                name="transaction_user_type_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(fields=["date"], name="transaction_date_idx"),
+        ),
+    ]
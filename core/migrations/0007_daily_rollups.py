@@ -0,0 +1,130 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    sources = [
+        ("Transaction", "DailyTransactionRollup", "transaction_type", TruncDate("date")),
+        ("Expense", "DailyExpenseRollup", "category", F("date")),
+    ]
+    for source_name, rollup_name, key_field, day in sources:
+        source = apps.get_model("core", source_name)
+        rollup = apps.get_model("core", rollup_name)
+        rows = (
+            source.objects.annotate(day=day)
+            .values("user_id", "day", key_field)
+            .annotate(total_amount=Sum("amount"), count=Count("pk"))
+            .order_by()
+        )
+        rollup.objects.bulk_create((rollup(**row) for row in rows.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0006_access_pattern_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyExpenseRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("category", models.CharField(max_length=50)),
+                (
+                    "total_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DailyTransactionRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "transaction_type",
+                    models.CharField(
+                        choices=[
+                            ("DEPOSIT", "Deposit"),
+                            ("WITHDRAWAL", "Withdrawal"),
+                            ("TRANSFER", "Transfer"),
+                            ("PAYMENT", "Payment"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "total_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["day"], name="transaction_rollup_day_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailytransactionrollup",
+            constraint=models.UniqueConstraint(
+                fields=("user", "day", "transaction_type"),
+                name="transaction_rollup_unique",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dailyexpenserollup",
+            index=models.Index(
+                fields=["user", "category", "day"], name="expense_rollup_category_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dailyexpenserollup",
+            index=models.Index(fields=["day"], name="expense_rollup_day_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="dailyexpenserollup",
+            constraint=models.UniqueConstraint(
+                fields=("user", "day", "category"), name="expense_rollup_unique"
+            ),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_daily_rollups"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="savingsgoal",
+            index=models.Index(
+                fields=["user", "start_date"], name="savings_goal_user_start_idx"
+            ),
+        ),
+    ]
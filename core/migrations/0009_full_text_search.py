@@ -0,0 +1,133 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+from collections import Counter
+
+# MySQL searches descriptions with FULLTEXT indexes; other databases get the SearchTerm inverted index
+FULLTEXT_INDEXES = [
+    ("core_transaction", "transaction_description_ft"),
+    ("core_expense", "expense_description_ft"),
+]
+
+
+def add_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    for table, name in FULLTEXT_INDEXES:
+        schema_editor.execute(f"ALTER TABLE {table} ADD FULLTEXT INDEX {name} (description)")
+
+
+def remove_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    for table, name in FULLTEXT_INDEXES:
+        schema_editor.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+
+
+def backfill_search_terms(apps, schema_editor):
+    # Same tokenizer as core.models.search_tokens
+    if schema_editor.connection.vendor == "mysql":
+        return
+    SearchTerm = apps.get_model("core", "SearchTerm")
+    for source, model_name in (("transaction", "Transaction"), ("expense", "Expense")):
+        rows = apps.get_model("core", model_name).objects.values_list("pk", "user_id", "description")
+        terms = []
+        for pk, user_id, description in rows.iterator(chunk_size=2000):
+            words = re.findall(r"\w+", (description or "").lower())
+            counts = Counter(word for word in words if 3 <= len(word) <= 64)
+            terms.extend(
+                SearchTerm(source=source, object_id=pk, user_id=user_id, term=term, frequency=frequency)
+                for term, frequency in counts.items()
+            )
+            if len(terms) >= 5000:
+                SearchTerm.objects.bulk_create(terms, batch_size=1000)
+                terms = []
+        SearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0008_savings_goal_user_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[
+                            ("transaction", "Transaction"),
+                            ("expense", "Expense"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("term", models.CharField(max_length=64)),
+                ("frequency", models.PositiveIntegerField(default=1)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.ForeignObject(
+                        from_fields=("object_id",),
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="search_terms",
+                        to="core.transaction",
+                        to_fields=("id",),
+                    ),
+                ),
+                (
+                    "expense",
+                    models.ForeignObject(
+                        from_fields=("object_id",),
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="search_terms",
+                        to="core.expense",
+                        to_fields=("id",),
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "source", "term", "frequency", "object_id"],
+                        name="search_term_user_idx",
+                    ),
+                    models.Index(
+                        fields=["source", "object_id"], name="search_term_object_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="searchterm",
+            constraint=models.UniqueConstraint(
+                fields=("source", "term", "object_id"), name="search_term_unique"
+            ),
+        ),
+        migrations.RunPython(add_fulltext_indexes, remove_fulltext_indexes),
+        migrations.RunPython(backfill_search_terms, migrations.RunPython.noop),
+    ]
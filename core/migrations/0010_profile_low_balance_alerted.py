@@ -0,0 +1,25 @@
+# Generated by Django 4.2.13 on 2026-10-18 02:31
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_current_low_balances(apps, schema_editor):
+    # Users already below their threshold were alerted by the old per-save check; don't alert them again
+    Profile = apps.get_model("core", "Profile")
+    Profile.objects.filter(balance__lt=F("low_balance_threshold")).update(low_balance_alerted=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0009_full_text_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="low_balance_alerted",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_current_low_balances, migrations.RunPython.noop),
+    ]
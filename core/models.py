@@ -1,9 +1,16 @@
-from django.db import models
+import re
+from collections import Counter, defaultdict
+from datetime import datetime
+from decimal import Decimal
+from django.db import IntegrityError, connections, models, router, transaction as db_transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
 from django.contrib.auth.models import User
 from django.core.mail import send_mail
-from twilio.rest import Client
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
+from .sms_backends import get_sms_backend
+from .cache_utils import bump_user_versions_on_commit
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -11,19 +18,65 @@ class Profile(models.Model):
     email_notifications = models.BooleanField(default=True)
     sms_notifications = models.BooleanField(default=False)
     low_balance_threshold = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Set by sweep_low_balances once the user has been alerted about being below low_balance_threshold,
+    # cleared when the balance recovers, so each crossing is notified once
+    low_balance_alerted = models.BooleanField(default=False)
+
+    def save(self, *args, **kwargs):
+        # balance is maintained in place by apply_balance_deltas and low_balance_alerted by sweep_low_balances,
+        # so never write back a stale in-memory copy
+        if self.pk and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('balance', 'low_balance_alerted')
+            ]
+        super().save(*args, **kwargs)
 
 class Notification(models.Model):
+    PENDING = 'PENDING'
+    SENT = 'SENT'
+    FAILED = 'FAILED'
+
+    STATUSES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    subject = models.CharField(max_length=255, blank=True)
     message = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
     sent_via_email = models.BooleanField(default=False)
     sent_via_sms = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='notification_outbox_idx'),
+        ]
+
+def enqueue_notification(user, subject, message):
+    # Delivery happens out of band in process_notifications; callers inside an atomic block get the row
+    # committed (or rolled back) together with their own writes.
+    return Notification.objects.create(user=user, subject=subject, message=message)
+
+def enqueue_notifications(items, batch_size=None):
+    # items are (user_id, subject, message) tuples, written with one INSERT per batch
+    return Notification.objects.bulk_create(
+        [Notification(user_id=user_id, subject=subject, message=message) for user_id, subject, message in items],
+        batch_size=batch_size,
+    )
 
 def send_email_notification(user, subject, message):
     try:
         profile = user.profile
     except ObjectDoesNotExist:
-        return
+        return False
     if profile.email_notifications:
         send_mail(
             subject,
@@ -32,33 +85,197 @@ def send_email_notification(user, subject, message):
             [user.email],
             fail_silently=False,
         )
+        return True
+    return False
 
 def send_sms_notification(user, message):
     try:
         profile = user.profile
     except ObjectDoesNotExist:
-        return
+        return False
     if profile.sms_notifications and profile.phone_number:
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-        client.messages.create(
-            body=message,
-            from_=settings.TWILIO_PHONE_NUMBER,
-            to=profile.phone_number
+        get_sms_backend().send(profile.phone_number, message)
+        return True
+    return False
+
+def balance_delta(transaction_type, amount):
+    if transaction_type == Transaction.DEPOSIT:
+        return Decimal(str(amount))
+    if transaction_type == Transaction.WITHDRAWAL:
+        return -Decimal(str(amount))
+    return Decimal(0)
+
+def balance_aggregate():
+    # SQL counterpart of balance_delta, used to rebuild balances from the transaction history
+    return Sum(
+        Case(
+            When(transaction_type=Transaction.DEPOSIT, then=F('amount')),
+            When(transaction_type=Transaction.WITHDRAWAL, then=-F('amount')),
+            default=Value(0),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
         )
+    )
 
-def check_low_balance(user):
-    try:
-        profile = user.profile
-    except ObjectDoesNotExist:
+def apply_balance_deltas(deltas):
+    # deltas maps user id -> signed change, applied in place so concurrent writers don't clobber each other
+    for user_id, delta in deltas.items():
+        if delta:
+            Profile.objects.filter(user_id=user_id).update(balance=F('balance') + delta)
+
+def low_balance_message(profile):
+    subject = "Low Balance Alert"
+    message = f"Your account balance is below your set threshold of {profile.low_balance_threshold}. Current balance: {profile.balance}."
+    return subject, message
+
+def sweep_low_balances(batch_size=None):
+    # Set-based low-balance alerts, run on a schedule by `manage.py sweep_low_balances` instead of on every
+    # write: re-arms the users whose balance recovered, then claims the users who newly dropped below their
+    # threshold in batches, flagging them and enqueueing their alerts in the same transaction.
+    # Returns (alerted, rearmed).
+    batch_size = batch_size or getattr(settings, 'LOW_BALANCE_SWEEP_BATCH_SIZE', 500)
+    rearmed = Profile.objects.filter(low_balance_alerted=True, balance__gte=F('low_balance_threshold')).update(low_balance_alerted=False)
+    alerted = 0
+    while True:
+        with db_transaction.atomic():
+            crossed = list(
+                Profile.objects.select_for_update(skip_locked=True)
+                .filter(low_balance_alerted=False, balance__lt=F('low_balance_threshold'))
+                .only('pk', 'user_id', 'balance', 'low_balance_threshold')
+                .order_by('pk')[:batch_size]
+            )
+            if not crossed:
+                break
+            Profile.objects.filter(pk__in=[profile.pk for profile in crossed]).update(low_balance_alerted=True)
+            enqueue_notifications([(profile.user_id, *low_balance_message(profile)) for profile in crossed], batch_size=batch_size)
+        alerted += len(crossed)
+    return alerted, rearmed
+
+def rollup_deltas():
+    # (user id, day, type or category) -> [amount change, row count change]
+    return defaultdict(lambda: [Decimal(0), 0])
+
+def add_rollup_delta(deltas, user_id, day, key, amount, sign=1):
+    # Transaction dates are datetimes; rollups bucket them by local calendar day, like TruncDay
+    if isinstance(day, datetime):
+        day = timezone.localtime(day).date() if timezone.is_aware(day) else day.date()
+    entry = deltas[(user_id, day, key)]
+    entry[0] += sign * Decimal(str(amount))
+    entry[1] += sign
+
+def apply_rollup_deltas(model, key_field, deltas):
+    # One in-place UPDATE per touched (user, day, key) bucket, creating the bucket on first use
+    for (user_id, day, key), (amount, count) in deltas.items():
+        if not amount and not count:
+            continue
+        lookup = {'user_id': user_id, 'day': day, key_field: key}
+        changes = {'total_amount': F('total_amount') + amount, 'count': F('count') + count}
+        if model.objects.filter(**lookup).update(**changes):
+            continue
+        if count < 0:
+            # Reversing rows whose bucket is gone (their user is being deleted, or the rollups were never
+            # built): a negative bucket would be wrong, and rebuild_rollups covers the second case
+            continue
+        try:
+            with db_transaction.atomic():
+                model.objects.create(**lookup, total_amount=amount, count=count)
+        except IntegrityError:
+            # another writer created the bucket first
+            model.objects.filter(**lookup).update(**changes)
+
+def ingest_transactions(transactions, batch_size=None):
+    # Set-based counterpart of Transaction.save() for bulk imports: chunked INSERTs, one balance
+    # UPDATE per affected user and one batched notification enqueue. Low-balance alerts come from
+    # sweep_low_balances.
+    batch_size = batch_size or getattr(settings, 'TRANSACTION_BULK_BATCH_SIZE', 1000)
+    deltas = defaultdict(Decimal)
+    rollups = rollup_deltas()
+    notifications = []
+    with db_transaction.atomic():
+        for start in range(0, len(transactions), batch_size):
+            chunk = transactions[start:start + batch_size]
+            Transaction.objects.bulk_create(chunk, batch_size=batch_size)
+            index_search_documents(SearchTerm.TRANSACTION, chunk, batch_size=batch_size)
+            for transaction in chunk:
+                deltas[transaction.user_id] += balance_delta(transaction.transaction_type, transaction.amount)
+                add_rollup_delta(rollups, transaction.user_id, transaction.date, transaction.transaction_type, transaction.amount)
+                notifications.append((transaction.user_id, *transaction.notification_message()))
+        apply_balance_deltas(deltas)
+        apply_rollup_deltas(DailyTransactionRollup, 'transaction_type', rollups)
+        enqueue_notifications(notifications, batch_size=batch_size)
+        bump_user_versions_on_commit(deltas)
+    return transactions
+
+def update_transactions(changes, batch_size=None, user_id=None):
+    # changes maps transaction id -> {field: value}. Rows are locked with one query and written with
+    # one CASE-based UPDATE per batch; returns (updated, missing_ids) and writes nothing if any id is missing.
+    # With user_id, other users' transactions count as missing.
+    batch_size = batch_size or getattr(settings, 'TRANSACTION_BULK_BATCH_SIZE', 1000)
+    with db_transaction.atomic():
+        rows = Transaction.objects.select_for_update()
+        if user_id is not None:
+            rows = rows.filter(user_id=user_id)
+        existing = rows.in_bulk(list(changes))
+        missing = [pk for pk in changes if pk not in existing]
+        if missing:
+            return [], missing
+
+        deltas = defaultdict(Decimal)
+        rollups = rollup_deltas()
+        fields = set()
+        for pk, values in changes.items():
+            transaction = existing[pk]
+            deltas[transaction.user_id] -= balance_delta(transaction.transaction_type, transaction.amount)
+            add_rollup_delta(rollups, transaction.user_id, transaction.date, transaction.transaction_type, transaction.amount, sign=-1)
+            for field, value in values.items():
+                setattr(transaction, field, value)
+            deltas[transaction.user_id] += balance_delta(transaction.transaction_type, transaction.amount)
+            add_rollup_delta(rollups, transaction.user_id, transaction.date, transaction.transaction_type, transaction.amount)
+            fields.update(values)
+
+        updated = [existing[pk] for pk in changes]
+        if fields:
+            Transaction.objects.bulk_update(updated, sorted(fields), batch_size=batch_size)
+        if fields & {'description', 'user'}:
+            index_search_documents(SearchTerm.TRANSACTION, updated, batch_size=batch_size)
+        apply_balance_deltas(deltas)
+        apply_rollup_deltas(DailyTransactionRollup, 'transaction_type', rollups)
+        bump_user_versions_on_commit(deltas)
+    return updated, []
+
+# Words shorter than InnoDB's default innodb_ft_min_token_size aren't indexed, on either search backend
+SEARCH_MIN_TOKEN_LENGTH = 3
+SEARCH_MAX_TOKEN_LENGTH = 64
+
+def search_tokens(text):
+    # word -> occurrences, lowercased; the terms of the inverted index and of ?q= searches
+    words = re.findall(r'\w+', (text or '').lower())
+    return Counter(word for word in words if SEARCH_MIN_TOKEN_LENGTH <= len(word) <= SEARCH_MAX_TOKEN_LENGTH)
+
+def uses_search_index():
+    # MySQL searches descriptions through its FULLTEXT indexes; other databases use the SearchTerm table
+    return connections[router.db_for_write(SearchTerm)].vendor != 'mysql'
+
+def index_search_documents(source, documents, batch_size=None):
+    # (Re)writes the SearchTerm rows of saved Transactions/Expenses; set-based, for the bulk write paths
+    if not uses_search_index():
         return
+    batch_size = batch_size or getattr(settings, 'TRANSACTION_BULK_BATCH_SIZE', 1000)
+    documents = list(documents)
+    for start in range(0, len(documents), batch_size):
+        chunk = documents[start:start + batch_size]
+        SearchTerm.objects.filter(source=source, object_id__in=[document.pk for document in chunk]).delete()
+        SearchTerm.objects.bulk_create(
+            [
+                SearchTerm(source=source, object_id=document.pk, user_id=document.user_id, term=term, frequency=frequency)
+                for document in chunk
+                for term, frequency in search_tokens(document.description).items()
+            ],
+            batch_size=batch_size,
+        )
 
-    total_balance = sum(transaction.amount for transaction in Transaction.objects.filter(user=user, transaction_type=Transaction.DEPOSIT)) - sum(transaction.amount for transaction in Transaction.objects.filter(user=user, transaction_type=Transaction.WITHDRAWAL))
-    
-    if total_balance < profile.low_balance_threshold:
-        subject = "Low Balance Alert"
-        message = f"Your account balance is below your set threshold of {profile.low_balance_threshold}. Current balance: {total_balance}."
-        send_email_notification(user, subject, message)
-        send_sms_notification(user, message)
+def delete_search_documents(source, object_ids):
+    if uses_search_index():
+        SearchTerm.objects.filter(source=source, object_id__in=list(object_ids)).delete()
 
 class Transaction(models.Model):
     DEPOSIT = 'DEPOSIT'
@@ -82,13 +299,56 @@ class Transaction(models.Model):
     date = models.DateTimeField(auto_now_add=True)
     description = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='transaction_user_date_idx'),
+            models.Index(fields=['user', 'transaction_type', 'date'], name='transaction_user_type_idx'),
+            models.Index(fields=['date'], name='transaction_date_idx'),
+        ]
+
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+        with db_transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = Transaction.objects.select_for_update().filter(pk=self.pk).values('user_id', 'transaction_type', 'amount', 'date').first()
+            super().save(*args, **kwargs)
+
+            deltas = defaultdict(Decimal)
+            rollups = rollup_deltas()
+            if previous:
+                deltas[previous['user_id']] -= balance_delta(previous['transaction_type'], previous['amount'])
+                add_rollup_delta(rollups, previous['user_id'], previous['date'], previous['transaction_type'], previous['amount'], sign=-1)
+            deltas[self.user_id] += balance_delta(self.transaction_type, self.amount)
+            add_rollup_delta(rollups, self.user_id, self.date, self.transaction_type, self.amount)
+            apply_balance_deltas(deltas)
+            apply_rollup_deltas(DailyTransactionRollup, 'transaction_type', rollups)
+            # covers the previous owner too when a transaction is moved between users
+            bump_user_versions_on_commit(deltas)
+
+            subject, message = self.notification_message()
+            enqueue_notification(self.user, subject, message)
+
+    def notification_message(self):
         subject = f"New {self.get_transaction_type_display()} Transaction"
         message = f"A {self.get_transaction_type_display().lower()} of {self.amount} was made on your account."
-        send_email_notification(self.user, subject, message)
-        send_sms_notification(self.user, message)
-        check_low_balance(self.user)
+        return subject, message
+
+class DailyTransactionRollup(models.Model):
+    # Per-user daily totals by type, maintained incrementally by every Transaction write path
+    # (rebuild with `manage.py rebuild_rollups`)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    day = models.DateField()
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TRANSACTION_TYPES)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day', 'transaction_type'], name='transaction_rollup_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='transaction_rollup_day_idx'),
+        ]
 
 class Investment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -96,6 +356,12 @@ class Investment(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='investment_user_date_idx'),
+            models.Index(fields=['date'], name='investment_date_idx'),
+        ]
+
 class Budget(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     category = models.CharField(max_length=50)
@@ -103,6 +369,12 @@ class Budget(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'category'], name='budget_user_category_idx'),
+            models.Index(fields=['user', 'start_date', 'end_date'], name='budget_user_period_idx'),
+        ]
+
 class Expense(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     category = models.CharField(max_length=50)
@@ -110,6 +382,45 @@ class Expense(models.Model):
     date = models.DateField()
     description = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='expense_user_date_idx'),
+            models.Index(fields=['user', 'category', 'date'], name='expense_user_category_idx'),
+            models.Index(fields=['date'], name='expense_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        with db_transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = Expense.objects.select_for_update().filter(pk=self.pk).values('user_id', 'date', 'category', 'amount').first()
+            super().save(*args, **kwargs)
+
+            rollups = rollup_deltas()
+            if previous:
+                add_rollup_delta(rollups, previous['user_id'], previous['date'], previous['category'], previous['amount'], sign=-1)
+            add_rollup_delta(rollups, self.user_id, self.date, self.category, self.amount)
+            apply_rollup_deltas(DailyExpenseRollup, 'category', rollups)
+            # covers the previous owner too when an expense is moved between users
+            bump_user_versions_on_commit({self.user_id, previous['user_id']} if previous else {self.user_id})
+
+class DailyExpenseRollup(models.Model):
+    # Per-user daily totals by category, maintained incrementally by Expense.save() and deletes
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    day = models.DateField()
+    category = models.CharField(max_length=50)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day', 'category'], name='expense_rollup_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'category', 'day'], name='expense_rollup_category_idx'),
+            models.Index(fields=['day'], name='expense_rollup_day_idx'),
+        ]
+
 class SavingsGoal(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     goal_name = models.CharField(max_length=100)
@@ -117,3 +428,43 @@ class SavingsGoal(models.Model):
     current_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     start_date = models.DateField()
     end_date = models.DateField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'start_date'], name='savings_goal_user_start_idx'),
+        ]
+
+class SearchTerm(models.Model):
+    # Inverted index over Transaction and Expense descriptions for databases without FULLTEXT (see
+    # core.search_utils): one row per distinct word per document. Kept current by core.signals and the
+    # bulk write paths; rebuild with `manage.py rebuild_search_index`.
+    TRANSACTION = 'transaction'
+    EXPENSE = 'expense'
+    SOURCES = [
+        (TRANSACTION, 'Transaction'),
+        (EXPENSE, 'Expense'),
+    ]
+
+    source = models.CharField(max_length=20, choices=SOURCES)
+    object_id = models.BigIntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    term = models.CharField(max_length=SEARCH_MAX_TOKEN_LENGTH)
+    frequency = models.PositiveIntegerField(default=1)
+    # Column-less relations so searches can join documents to their terms (Transaction.search_terms);
+    # object_id is only meaningful together with source
+    transaction = models.ForeignObject(
+        Transaction, on_delete=models.DO_NOTHING, from_fields=['object_id'], to_fields=['id'], related_name='search_terms',
+    )
+    expense = models.ForeignObject(
+        Expense, on_delete=models.DO_NOTHING, from_fields=['object_id'], to_fields=['id'], related_name='search_terms',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'term', 'object_id'], name='search_term_unique'),
+        ]
+        indexes = [
+            # Covers a user's posting list in rank order, so single-word searches never touch the table
+            models.Index(fields=['user', 'source', 'term', 'frequency', 'object_id'], name='search_term_user_idx'),
+            models.Index(fields=['source', 'object_id'], name='search_term_object_idx'),
+        ]
@@ -0,0 +1,174 @@
+import asyncio
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.mail import get_connection, send_mail
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from .models import Notification
+from .sms_backends import get_sms_backend
+
+
+def retry_delay(attempts):
+    base = getattr(settings, 'NOTIFICATION_RETRY_BACKOFF', 30)
+    cap = getattr(settings, 'NOTIFICATION_RETRY_BACKOFF_MAX', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def split_jobs(batch):
+    # Pending email notifications and (notification, phone) SMS jobs, per the user's profile preferences
+    email_jobs, sms_jobs = [], []
+    for notification in batch:
+        try:
+            profile = notification.user.profile
+        except ObjectDoesNotExist:
+            continue
+        if not notification.sent_via_email and profile.email_notifications:
+            email_jobs.append(notification)
+        if not notification.sent_via_sms and profile.sms_notifications and profile.phone_number:
+            sms_jobs.append((notification, profile.phone_number))
+    return email_jobs, sms_jobs
+
+
+def send_email_jobs(email_jobs, errors):
+    if not email_jobs:
+        return
+    try:
+        with get_connection() as connection:
+            for notification in email_jobs:
+                try:
+                    send_mail(
+                        notification.subject,
+                        notification.message,
+                        settings.DEFAULT_FROM_EMAIL,
+                        [notification.user.email],
+                        connection=connection,
+                    )
+                    notification.sent_via_email = True
+                except Exception as exc:
+                    errors[notification.pk] = exc
+    except Exception as exc:
+        for notification in email_jobs:
+            if not notification.sent_via_email:
+                errors.setdefault(notification.pk, exc)
+
+
+def apply_sms_results(sms_jobs, results, errors):
+    for (notification, _), result in zip(sms_jobs, results):
+        if result['error'] is None:
+            notification.sent_via_sms = True
+        else:
+            errors.setdefault(notification.pk, result['error'])
+
+
+def sms_failures(messages, exc):
+    return [{'to': to, 'sid': None, 'error': exc} for to, _ in messages]
+
+
+def deliver_batch(batch):
+    # Sends every pending channel for the batch over one SMTP connection and one SMS dispatch.
+    # The sent_via_* flags are persisted even when the other channel fails, so a retry never
+    # re-sends a channel that already went out. Returns {notification id: exception}.
+    errors = {}
+    email_jobs, sms_jobs = split_jobs(batch)
+    send_email_jobs(email_jobs, errors)
+    if sms_jobs:
+        messages = [(phone, notification.message) for notification, phone in sms_jobs]
+        try:
+            results = get_sms_backend().send_messages(messages)
+        except Exception as exc:
+            results = sms_failures(messages, exc)
+        apply_sms_results(sms_jobs, results, errors)
+    return errors
+
+
+async def adeliver_batch(batch):
+    # Async twin of deliver_batch: SMTP runs in a worker thread while the SMS backend sends on the
+    # event loop, so both channels are in flight at once.
+    errors = {}
+    email_jobs, sms_jobs = split_jobs(batch)
+    messages = [(phone, notification.message) for notification, phone in sms_jobs]
+
+    async def send_sms_jobs():
+        if not messages:
+            return []
+        try:
+            return await get_sms_backend().asend_messages(messages)
+        except Exception as exc:
+            return sms_failures(messages, exc)
+
+    _, results = await asyncio.gather(
+        sync_to_async(send_email_jobs, thread_sensitive=False)(email_jobs, errors),
+        send_sms_jobs(),
+    )
+    apply_sms_results(sms_jobs, results, errors)
+    return errors
+
+
+def record_results(batch, errors, now, max_attempts):
+    stats = {'sent': 0, 'retried': 0, 'failed': 0}
+    for notification in batch:
+        exc = errors.get(notification.pk)
+        if exc is None:
+            notification.status = Notification.SENT
+            stats['sent'] += 1
+            continue
+        notification.attempts += 1
+        notification.last_error = f"{type(exc).__name__}: {exc}"
+        if notification.attempts >= max_attempts:
+            notification.status = Notification.FAILED
+            stats['failed'] += 1
+        else:
+            notification.next_attempt_at = now + retry_delay(notification.attempts)
+            stats['retried'] += 1
+    Notification.objects.bulk_update(
+        batch,
+        ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_via_email', 'sent_via_sms'],
+    )
+    stats['processed'] = len(batch)
+    return stats
+
+
+def due_notifications(batch_size, now):
+    return (
+        Notification.objects.select_for_update(skip_locked=True)
+        .select_related('user__profile')
+        .filter(status=Notification.PENDING, next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'id')[:batch_size]
+    )
+
+
+def process_notification_batch(batch_size=None, max_attempts=None):
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_BATCH_SIZE', 100)
+    max_attempts = max_attempts or getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5)
+    now = timezone.now()
+    # Claim with a lease and send outside any transaction, so a slow SMTP/SMS provider never holds row locks
+    batch = claim_batch(batch_size, now)
+    errors = deliver_batch(batch)
+    return record_batch_results(batch, errors, now, max_attempts)
+
+
+def claim_batch(batch_size, now):
+    # Leases the batch by pushing next_attempt_at past the lease, so other workers skip these rows while
+    # they are sent outside any transaction; a crashed worker's rows become due again when the lease ends.
+    lease = timedelta(seconds=getattr(settings, 'NOTIFICATION_LEASE', 300))
+    with db_transaction.atomic():
+        batch = list(due_notifications(batch_size, now))
+        Notification.objects.filter(pk__in=[notification.pk for notification in batch]).update(next_attempt_at=now + lease)
+    return batch
+
+
+async def aprocess_notification_batch(batch_size=None, max_attempts=None):
+    # Same claim/send/record steps as process_notification_batch, with the sends on the event loop
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_BATCH_SIZE', 100)
+    max_attempts = max_attempts or getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5)
+    now = timezone.now()
+    batch = await sync_to_async(claim_batch)(batch_size, now)
+    errors = await adeliver_batch(batch)
+    return await sync_to_async(record_batch_results)(batch, errors, now, max_attempts)
+
+
+def record_batch_results(batch, errors, now, max_attempts):
+    with db_transaction.atomic():
+        return record_results(batch, errors, now, max_attempts)
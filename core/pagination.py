@@ -0,0 +1,144 @@
+import base64
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .plan_utils import check_query_cost
+
+
+class DateIdCursorPagination(BasePagination):
+    # Keyset pagination on (cursor_field, id), newest first. Each page is one indexed range query
+    # (field < v OR field = v AND id < pk), so page 10,000 costs the same as page 1. Views pick the
+    # column with a `cursor_field` attribute; models without it page on id alone. A queryset that a filter
+    # ordered (?ordering=, ranked search results from core.search_utils) pages on its leading key instead,
+    # in that direction. Requests with filters are EXPLAINed first and refused if the plan is expensive.
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    invalid_cursor_message = 'Invalid cursor'
+    # Query parameters that can't change the plan of the page query
+    unfiltered_query_params = {'cursor', 'page_size', 'fields', 'format'}
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.field, descending = self.get_cursor_ordering(queryset, view)
+        cursor = self.decode_cursor(request, queryset)
+
+        if cursor is None:
+            reverse = False
+        else:
+            value, pk, reverse = cursor
+            lookup = 'lt' if descending != reverse else 'gt'
+            if self.field == 'pk':
+                after = Q(**{f'pk__{lookup}': pk})
+            else:
+                after = Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'pk__{lookup}': pk})
+            queryset = queryset.filter(after)
+
+        queryset = queryset.order_by(*self.page_ordering(self.field, descending != reverse))[:self.page_size + 1]
+        if set(request.query_params) - self.unfiltered_query_params:
+            check_query_cost(queryset)
+        rows = list(queryset)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE
+        if self.page_size_query_param in request.query_params:
+            try:
+                page_size = int(request.query_params[self.page_size_query_param])
+            except ValueError:
+                pass
+        if page_size is not None and page_size <= 0:
+            page_size = api_settings.PAGE_SIZE
+        return min(page_size, self.max_page_size) if page_size else page_size
+
+    def get_cursor_ordering(self, queryset, view):
+        # (field, descending)
+        ordering = queryset.query.order_by
+        if ordering and isinstance(ordering[0], str):
+            field = ordering[0].lstrip('-')
+            return ('pk' if field == queryset.model._meta.pk.name else field), ordering[0].startswith('-')
+        field = getattr(view, 'cursor_field', 'date')
+        try:
+            queryset.model._meta.get_field(field)
+        except FieldDoesNotExist:
+            return 'pk', True
+        return field, True
+
+    def page_ordering(self, field, descending):
+        ordering = ['pk'] if field == 'pk' else [field, 'pk']
+        return [f'-{name}' for name in ordering] if descending else ordering
+
+    def row_position(self, row):
+        if isinstance(row, dict):
+            return (row.get(self.field) if self.field != 'pk' else None), row['id']
+        return (getattr(row, self.field) if self.field != 'pk' else None), row.pk
+
+    def encode_cursor(self, row, reverse):
+        value, pk = self.row_position(row)
+        # isoformat keeps microseconds, which DjangoJSONEncoder would truncate and so skip rows
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        payload = json.dumps({'v': value, 'id': pk, 'r': int(reverse)})
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, queryset):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            value = payload['v']
+            if self.field in queryset.query.annotations:
+                value = queryset.query.annotations[self.field].output_field.to_python(value)
+            elif self.field != 'pk':
+                value = queryset.model._meta.get_field(self.field).to_python(value)
+            return value, int(payload['id']), bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
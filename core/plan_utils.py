@@ -0,0 +1,67 @@
+import json
+import re
+from django.conf import settings
+from django.db import connections
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+# Reading query plans: which tables a plan reads without an index, and what the planner thinks a query
+# costs. Used by the check_query_plans command and by the cost guard on filtered list requests.
+
+
+class QueryTooExpensive(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "This combination of filters is too expensive to run. Narrow it down, e.g. with a date range."
+    default_code = 'query_too_expensive'
+
+
+def full_scans(plan, vendor):
+    # Returns the tables the plan reads without an index
+    if vendor == 'mysql':
+        return sorted({table['table_name'] for table in _mysql_tables(json.loads(plan)) if table.get('access_type') == 'ALL'})
+    if vendor == 'postgresql':
+        return sorted(set(re.findall(r'Seq Scan on (\w+)', plan)))
+    # SQLite: "SCAN core_transaction" is a table scan, "SCAN ... USING [COVERING] INDEX" walks an index
+    return sorted(set(re.findall(r'SCAN (\w+)(?! USING)\s*$', plan, re.MULTILINE)))
+
+
+def sorts_full_scan(plan):
+    # SQLite: the plan reads a whole table or index (SCAN rather than SEARCH) and sorts it in a temp B-tree,
+    # so every row is read before LIMIT applies. A SCAN already in the requested order (the rowid for
+    # ?ordering=id, the date index for a list) stops after one page, and a sorted SEARCH is bounded by its range.
+    return bool(re.search(r'\bSCAN \w+', plan)) and 'USE TEMP B-TREE' in plan
+
+
+def _mysql_tables(node):
+    if isinstance(node, dict):
+        if 'table' in node and isinstance(node['table'], dict):
+            yield node['table']
+        for value in node.values():
+            yield from _mysql_tables(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _mysql_tables(value)
+
+
+def plan_cost(queryset):
+    # The planner's total cost estimate, or None on databases that don't report one (SQLite)
+    vendor = connections[queryset.db].vendor
+    if vendor == 'mysql':
+        return float(json.loads(queryset.explain(format='json'))['query_block']['cost_info']['query_cost'])
+    if vendor == 'postgresql':
+        return float(json.loads(queryset.explain(format='json'))[0]['Plan']['Total Cost'])
+    return None
+
+
+def check_query_cost(queryset):
+    # Raises QueryTooExpensive when the planner expects `queryset` to be expensive: a cost estimate above
+    # QUERY_COST_LIMIT where the database gives one, on SQLite a sorted full scan, otherwise any full scan
+    cost = plan_cost(queryset)
+    if cost is not None:
+        if cost > settings.QUERY_COST_LIMIT:
+            raise QueryTooExpensive()
+        return
+    vendor = connections[queryset.db].vendor
+    plan = queryset.explain()
+    if sorts_full_scan(plan) if vendor == 'sqlite' else full_scans(plan, vendor):
+        raise QueryTooExpensive()
@@ -0,0 +1,29 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib-based JSONRenderer is used instead
+    orjson = None
+
+
+class OrjsonRenderer(JSONRenderer):
+    # JSONRenderer on orjson, several times faster on large lists, with the same output: datetimes ('Z' for
+    # UTC), raw Decimals (floats; serializers already turn model decimals into strings) and anything else
+    # orjson doesn't know go through DRF's encoder.
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+    default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # orjson only writes compact UTF-8; indented output (the browsable API, ?indent=) and the ASCII/
+        # non-compact settings take the regular path
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=self.default, option=self.options)
+        # Same strict-JavaScript-subset escaping as JSONRenderer
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
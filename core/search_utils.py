@@ -0,0 +1,73 @@
+import operator
+from functools import reduce
+from django.db.models import ExpressionWrapper, F, FilteredRelation, FloatField, Func, IntegerField, Q
+from rest_framework.filters import BaseFilterBackend
+from .models import search_tokens, uses_search_index
+
+# Full-text search over Transaction and Expense descriptions. MySQL uses the FULLTEXT indexes from migration
+# 0009 with MATCH ... AGAINST; other databases use the SearchTerm inverted index. Either way every word of
+# the query must match, results carry a `search_rank` annotation (higher is more relevant) and the cursor
+# paginator pages on it.
+SEARCH_RANK = 'search_rank'
+
+
+class Match(Func):
+    output_field = FloatField()
+
+    def __init__(self, field, query):
+        super().__init__(F(field))
+        self.query = query
+
+    def as_sql(self, compiler, connection, **extra_context):
+        column, params = compiler.compile(self.source_expressions[0])
+        return f"MATCH ({column}) AGAINST (%s IN BOOLEAN MODE)", (*params, self.query)
+
+
+def search(queryset, query, user_id=None):
+    # Rows of a Transaction/Expense queryset whose description contains every word of `query`, best first.
+    # Pass user_id when the queryset is scoped to one user so the index lookup is too.
+    tokens = sorted(search_tokens(query))
+    if not tokens:
+        return queryset.none()
+    if not uses_search_index():
+        rank = Match('description', ' '.join(f'+{token}' for token in tokens))
+        return queryset.annotate(**{SEARCH_RANK: rank}).filter(**{f'{SEARCH_RANK}__gt': 0}).order_by(f'-{SEARCH_RANK}', '-pk')
+
+    # One inner join to the document's term row per query word: the first word's posting list drives (from
+    # the covering user index when scoped) and the others are probed by (source, term, object_id), so the
+    # cost follows the number of matches rather than the size of the history
+    source = queryset.model._meta.model_name
+    relations = {}
+    for position, token in enumerate(tokens):
+        condition = Q(search_terms__source=source, search_terms__term=token)
+        if user_id is not None:
+            condition &= Q(search_terms__user_id=user_id)
+        relations[f'search_term_{position}'] = FilteredRelation('search_terms', condition=condition)
+    # Rank: how often the query words occur in the description
+    rank = reduce(operator.add, (F(f'{name}__frequency') for name in relations))
+    return (
+        queryset.annotate(**relations)
+        .filter(**{f'{name}__frequency__isnull': False for name in relations})
+        .annotate(**{SEARCH_RANK: ExpressionWrapper(rank, output_field=IntegerField())})
+        .order_by(f'-{SEARCH_RANK}', '-pk')
+    )
+
+class FullTextSearchFilter(BaseFilterBackend):
+    # ?q=coffee+shop on the Transaction and Expense viewsets; combines with their user scoping and date filters
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        user_id = view.get_scope_user_id() if hasattr(view, 'get_scope_user_id') else None
+        return search(queryset, query, user_id)
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': "Words that must all appear in the description; results are ordered by relevance.",
+            'schema': {'type': 'string'},
+        }]
@@ -0,0 +1,151 @@
+import decimal
+from functools import lru_cache
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+# Fast read path for list endpoints: serializers made only of plain model columns are compiled into one
+# function that turns a values() row into the dict the serializer would produce, so a page of rows costs
+# one dict comprehension instead of a serializer, a model instance and a to_representation call per field
+# per row. Serializers with nested, method or hyperlinked fields aren't compiled and keep the regular path.
+
+# to_representation is the identity for database values of these fields
+IDENTITY = {
+    serializers.IntegerField.to_representation,
+    serializers.CharField.to_representation,
+    serializers.BooleanField.to_representation,
+    serializers.ChoiceField.to_representation,
+}
+
+
+class RowSerializer:
+    def __init__(self, columns, to_dict):
+        self.columns = columns
+        self.to_dict = to_dict
+
+    def __call__(self, rows):
+        to_dict = self.to_dict
+        return [to_dict(row) for row in rows]
+
+
+def sparse_fields(request, field_names):
+    # ?fields=id,amount,date -> the requested subset of field_names, in serializer order; None for all fields
+    requested = {name.strip() for name in request.query_params.get('fields', '').split(',') if name.strip()}
+    if not requested:
+        return None
+    unknown = requested - set(field_names)
+    if unknown:
+        raise ValidationError({'fields': [f"Unknown fields: {', '.join(sorted(unknown))}. Choose from: {', '.join(field_names)}."]})
+    return [name for name in field_names if name in requested]
+
+
+def row_serializer(serializer, fields=None):
+    # The compiled RowSerializer for `serializer` (limited to `fields`), or None if it can't be compiled.
+    # Datetimes are converted to the active timezone, so that is part of the cache key.
+    return _compile(type(serializer), tuple(fields) if fields is not None else None, timezone.get_current_timezone_name())
+
+
+@lru_cache(maxsize=256)
+def _compile(serializer_class, fields, timezone_name):
+    serializer = serializer_class()
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is None or type(serializer).to_representation is not serializers.Serializer.to_representation:
+        return None
+
+    columns, entries, namespace = [], [], {}
+    for field in serializer._readable_fields:
+        if fields is not None and field.field_name not in fields:
+            continue
+        column = model_column(model, field)
+        if column is None:
+            return None
+        value = f"row[{column!r}]"
+        converter = field_converter(field)
+        if converter is not None:
+            name = f"convert_{len(namespace)}"
+            namespace[name] = converter
+            value = f"{name}({value})"
+        columns.append(column)
+        entries.append(f"{field.field_name!r}: {value}")
+
+    exec(f"def to_dict(row):\n    return {{{', '.join(entries)}}}\n", namespace)
+    return RowSerializer(columns, namespace['to_dict'])
+
+
+def model_column(model, field):
+    # The values() column a field reads, if it reads exactly one concrete column of the model
+    source = field.source
+    if isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField)) or source == '*' or '.' in source:
+        return None
+    if isinstance(field, serializers.RelatedField) and not (
+        isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None
+    ):
+        return None
+    try:
+        model_field = model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+    if not model_field.concrete or model_field.many_to_many:
+        return None
+    # values() returns the related object's id for a foreign key, which is what PrimaryKeyRelatedField shows
+    return source
+
+
+def field_converter(field):
+    # Serializer.to_representation leaves None as None, so every converter does too
+    to_representation = type(field).to_representation
+    if to_representation in IDENTITY or isinstance(field, serializers.PrimaryKeyRelatedField):
+        return None
+    if to_representation is serializers.DecimalField.to_representation and not field.localize:
+        return decimal_converter(field)
+    if to_representation is serializers.DateTimeField.to_representation:
+        return datetime_converter(field)
+    if to_representation is serializers.DateField.to_representation:
+        return date_converter(field)
+    return lambda value: None if value is None else to_representation(field, value)
+
+
+def decimal_converter(field):
+    # DecimalField.to_representation with its quantize context built once
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None:
+        quantize = None
+    else:
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+        exponent = decimal.Decimal('.1') ** field.decimal_places
+        quantize = exponent, field.rounding, context
+
+    def convert(value):
+        if value is None:
+            return None
+        if quantize is not None:
+            value = value.quantize(quantize[0], rounding=quantize[1], context=quantize[2])
+        return '{:f}'.format(value) if coerce_to_string else value
+    return convert
+
+
+def datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return lambda value: None if value is None else field.to_representation(value)
+
+    def convert(value):
+        if not value:
+            return None
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def date_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return lambda value: None if value is None else field.to_representation(value)
+    return lambda value: value.isoformat() if value else None
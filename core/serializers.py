@@ -1,17 +1,87 @@
 from rest_framework import serializers
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.contrib.auth.models import User
+from .metrics import timed
 from .models import Profile, Transaction, Investment, Budget, Expense, SavingsGoal
 
-class UserSerializer(serializers.ModelSerializer):
+class TimedSerializerMixin:
+    # Reports validation and representation time to PerformanceMiddleware
+    @property
+    def data(self):
+        with timed('serializer'):
+            return super().data
+
+    def is_valid(self, *args, **kwargs):
+        with timed('serializer'):
+            return super().is_valid(*args, **kwargs)
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+class TimedModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    pass
+
+class BatchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    # Under a BatchedListSerializer, ids are looked up in the objects it loaded for the whole payload
+    # instead of with one query per row
+    def to_internal_value(self, data):
+        objects = getattr(self.root, 'related_objects', {}).get(self.field_name)
+        if objects is None:
+            return super().to_internal_value(data)
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in objects:
+            self.fail('does_not_exist', pk_value=data)
+        return objects[pk]
+
+class BatchedListSerializer(TimedListSerializer):
+    # many=True validation with one in_bulk() query per BatchedPrimaryKeyRelatedField, however many rows
+    # there are. Unknown ids are reported together, before any row is validated.
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.related_objects = self.load_related(data)
+        return super().to_internal_value(data)
+
+    def load_related(self, data):
+        related, errors = {}, {}
+        for name, field in self.child.fields.items():
+            if not isinstance(field, BatchedPrimaryKeyRelatedField) or field.read_only or field.pk_field is not None:
+                continue
+            queryset = field.get_queryset()
+            ids = set()
+            for item in data:
+                value = item.get(name) if isinstance(item, dict) else None
+                if value is None or isinstance(value, bool):
+                    continue
+                try:
+                    ids.add(queryset.model._meta.pk.to_python(value))
+                except (TypeError, ValueError, DjangoValidationError):
+                    # Left for the row's own type error
+                    continue
+            related[name] = queryset.in_bulk(list(ids))
+            missing = sorted(ids - set(related[name]))
+            if missing:
+                errors[name] = [f"{queryset.model._meta.verbose_name_plural.capitalize()} with IDs {', '.join(map(str, missing))} do not exist."]
+        if errors:
+            raise serializers.ValidationError(errors, code='does_not_exist')
+        return related
+
+class UserSerializer(TimedModelSerializer):
     class Meta:
         model = User
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(TimedModelSerializer):
     user = UserSerializer()
 
     class Meta:
         model = Profile
+        list_serializer_class = TimedListSerializer
         fields = ['user', 'phone_number']
 
     def create(self, validated_data):
@@ -36,11 +106,12 @@ class ProfileSerializer(serializers.ModelSerializer):
 
         return instance
 
-class TransactionSerializer(serializers.ModelSerializer):
-    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
+class TransactionSerializer(TimedModelSerializer):
+    user = BatchedPrimaryKeyRelatedField(queryset=User.objects.all())
 
     class Meta:
         model = Transaction
+        list_serializer_class = BatchedListSerializer
         fields = ['id', 'user', 'amount', 'transaction_type', 'date', 'description']
 
     def validate_amount(self, value):
@@ -48,11 +119,12 @@ class TransactionSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("The amount must be greater than zero.")
         return value
 
-class InvestmentSerializer(serializers.ModelSerializer):
-    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
+class InvestmentSerializer(TimedModelSerializer):
+    user = BatchedPrimaryKeyRelatedField(queryset=User.objects.all())
 
     class Meta:
         model = Investment
+        list_serializer_class = BatchedListSerializer
         fields = ['id', 'user', 'investment_type', 'amount', 'date']
 
     def validate_amount(self, value):
@@ -60,11 +132,12 @@ class InvestmentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("The amount must be greater than zero.")
         return value
 
-class BudgetSerializer(serializers.ModelSerializer):
-    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
+class BudgetSerializer(TimedModelSerializer):
+    user = BatchedPrimaryKeyRelatedField(queryset=User.objects.all())
 
     class Meta:
         model = Budget
+        list_serializer_class = BatchedListSerializer
         fields = ['id', 'user', 'category', 'amount', 'start_date', 'end_date']
 
     def validate_amount(self, value):
@@ -77,11 +150,12 @@ class BudgetSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Start date must be before end date.")
         return data
 
-class ExpenseSerializer(serializers.ModelSerializer):
-    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
+class ExpenseSerializer(TimedModelSerializer):
+    user = BatchedPrimaryKeyRelatedField(queryset=User.objects.all())
 
     class Meta:
         model = Expense
+        list_serializer_class = BatchedListSerializer
         fields = ['id', 'user', 'category', 'amount', 'date', 'description']
 
     def validate_amount(self, value):
@@ -89,11 +163,12 @@ class ExpenseSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("The amount must be greater than zero.")
         return value
 
-class SavingsGoalSerializer(serializers.ModelSerializer):
-    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
+class SavingsGoalSerializer(TimedModelSerializer):
+    user = BatchedPrimaryKeyRelatedField(queryset=User.objects.all())
 
     class Meta:
         model = SavingsGoal
+        list_serializer_class = BatchedListSerializer
         fields = ['id', 'user', 'goal_name', 'target_amount', 'current_amount', 'start_date', 'end_date']
 
     def validate_target_amount(self, value):
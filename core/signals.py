@@ -1,7 +1,12 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Profile
+from .models import (
+    Profile, Transaction, Investment, Budget, Expense, SavingsGoal, DailyTransactionRollup, DailyExpenseRollup, SearchTerm,
+    balance_delta, apply_balance_deltas, rollup_deltas, add_rollup_delta, apply_rollup_deltas,
+    index_search_documents, delete_search_documents,
+)
+from .cache_utils import bump_user_versions_on_commit
 
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
@@ -11,4 +16,62 @@ def create_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def save_profile(sender, instance, **kwargs):
     if hasattr(instance, 'profile'):
-        instance.profile.save()
\ No newline at end of file
+        instance.profile.save()
+
+def cascades_from_user(origin):
+    # The row is going because its User is being deleted (user.delete() or a User queryset delete), and the
+    # user's profile and rollup rows go with it, so there is nothing to reverse
+    return isinstance(origin, User) or getattr(origin, 'model', None) is User
+
+@receiver(post_delete, sender=Transaction)
+def reverse_transaction_balance(sender, instance, origin=None, **kwargs):
+    if cascades_from_user(origin):
+        return
+    apply_balance_deltas({instance.user_id: -balance_delta(instance.transaction_type, instance.amount)})
+    rollups = rollup_deltas()
+    add_rollup_delta(rollups, instance.user_id, instance.date, instance.transaction_type, instance.amount, sign=-1)
+    apply_rollup_deltas(DailyTransactionRollup, 'transaction_type', rollups)
+
+@receiver(post_delete, sender=Expense)
+def reverse_expense_rollup(sender, instance, origin=None, **kwargs):
+    if cascades_from_user(origin):
+        return
+    rollups = rollup_deltas()
+    add_rollup_delta(rollups, instance.user_id, instance.date, instance.category, instance.amount, sign=-1)
+    apply_rollup_deltas(DailyExpenseRollup, 'category', rollups)
+
+SEARCH_SOURCES = {Transaction: SearchTerm.TRANSACTION, Expense: SearchTerm.EXPENSE}
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=Expense)
+def index_description(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {'description', 'user', 'user_id'} & set(update_fields):
+        index_search_documents(SEARCH_SOURCES[sender], [instance])
+
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=Expense)
+def unindex_description(sender, instance, **kwargs):
+    delete_search_documents(SEARCH_SOURCES[sender], [instance.pk])
+
+@receiver(pre_save, sender=Budget)
+@receiver(pre_save, sender=Investment)
+@receiver(pre_save, sender=SavingsGoal)
+def remember_previous_user(sender, instance, raw=False, **kwargs):
+    # A row moved to another user has to invalidate the previous owner's cached results too
+    # (Transaction.save and Expense.save already read the previous row)
+    if instance.pk and not raw:
+        instance._previous_user_id = sender.objects.filter(pk=instance.pk).values_list('user_id', flat=True).first()
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=Budget)
+@receiver(post_save, sender=Investment)
+@receiver(post_save, sender=SavingsGoal)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Budget)
+@receiver(post_delete, sender=Investment)
+@receiver(post_delete, sender=SavingsGoal)
+def invalidate_user_cache(sender, instance, **kwargs):
+    previous_user_id = instance.__dict__.pop('_previous_user_id', None)
+    bump_user_versions_on_commit({instance.user_id, previous_user_id} - {None})
\ No newline at end of file
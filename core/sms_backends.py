@@ -0,0 +1,64 @@
+import sys
+import threading
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Messages captured by LocmemBackend, mirroring django.core.mail.outbox
+outbox = []
+
+
+class BaseSMSBackend:
+    def send(self, to, body):
+        raise NotImplementedError("Subclasses of BaseSMSBackend must implement send()")
+
+    def send_messages(self, messages):
+        # One {'to', 'sid', 'error'} result per (to, body) pair, in order
+        results = []
+        for to, body in messages:
+            try:
+                results.append({'to': to, 'sid': self.send(to, body), 'error': None})
+            except Exception as exc:
+                results.append({'to': to, 'sid': None, 'error': exc})
+        return results
+
+    async def asend_messages(self, messages):
+        # Backends without native async I/O run their sync send_messages in a worker thread
+        return await sync_to_async(self.send_messages, thread_sensitive=False)(messages)
+
+
+class TwilioBackend(BaseSMSBackend):
+    def send(self, to, body):
+        from .twilio_utils import send_sms
+        return send_sms(to, body)
+
+    def send_messages(self, messages):
+        from .twilio_utils import send_sms_batch
+        return send_sms_batch(messages)
+
+    async def asend_messages(self, messages):
+        from .twilio_utils import asend_sms_batch
+        return await asend_sms_batch(messages)
+
+
+class LocmemBackend(BaseSMSBackend):
+    _lock = threading.Lock()
+
+    def send(self, to, body):
+        with self._lock:
+            outbox.append({'to': to, 'body': body})
+            return f"LOCMEM{len(outbox)}"
+
+
+class ConsoleBackend(BaseSMSBackend):
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, to, body):
+        self.stream.write(f"SMS to {to}: {body}\n")
+        self.stream.flush()
+        return "CONSOLE"
+
+
+def get_sms_backend(backend=None):
+    return import_string(backend or getattr(settings, 'SMS_BACKEND', 'core.sms_backends.TwilioBackend'))()
@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import timedelta
+from decimal import Decimal
+from asgiref.sync import async_to_sync
+from django.core import mail
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+from core.models import Budget, Expense, Notification, Transaction, enqueue_notification
+from core.notifications import aprocess_notification_batch
+from core import sms_backends
+from .utils import clear_caches, make_user
+
+
+async def read_stream(response):
+    return b''.join([chunk async for chunk in response.streaming_content])
+
+
+class AsyncViewTests(TestCase):
+    # The /api/async/ views answer like their sync counterparts
+
+    def setUp(self):
+        clear_caches()
+        self.user = make_user('erin')
+        self.client = Client()
+        self.client.force_login(self.user)
+        for amount, kind in (('100.00', Transaction.DEPOSIT), ('40.00', Transaction.WITHDRAWAL), ('5.00', Transaction.PAYMENT)):
+            Transaction.objects.create(user=self.user, amount=Decimal(amount), transaction_type=kind, description='row')
+        today = timezone.localdate()
+        Budget.objects.create(user=self.user, category='Food', amount=Decimal('300.00'), start_date=today, end_date=today + timedelta(days=30))
+        Expense.objects.create(user=self.user, category='Food', amount=Decimal('12.50'), date=today, description='lunch')
+
+    def get_both(self, path):
+        sync, asynchronous = self.client.get(f'/api/{path}'), self.client.get(f'/api/async/{path}')
+        self.assertEqual((sync.status_code, asynchronous.status_code), (200, 200))
+        return json.loads(sync.content), json.loads(asynchronous.content)
+
+    def test_balance(self):
+        sync, asynchronous = self.get_both('balance/')
+        self.assertEqual(Decimal(str(asynchronous['data']['balance'])), Decimal('60.00'))
+        self.assertEqual(Decimal(str(sync['data']['balance'])), Decimal(str(asynchronous['data']['balance'])))
+
+    def test_statement(self):
+        today = timezone.localdate()
+        sync, asynchronous = self.get_both(f'statement/?start_date={today - timedelta(days=1)}&end_date={today}')
+        self.assertEqual(len(asynchronous['data']), 3)
+        self.assertEqual(asynchronous['data'], sync['data'])
+
+    def test_statement_csv(self):
+        today = timezone.localdate()
+        response = self.client.get(f'/api/async/statement/?start_date={today}&end_date={today}&format=csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(len(async_to_sync(read_stream)(response).decode().strip().splitlines()), 4)
+
+    def test_analytics(self):
+        for path in ('transactions/analytics/?granularity=month', 'investments/analytics/', 'budgets/analytics/'):
+            sync, asynchronous = self.get_both(path)
+            self.assertEqual(asynchronous['data'], sync['data'])
+
+    def test_anonymous_and_bad_credentials_get_the_sync_views_403(self):
+        anonymous = Client()
+        credentials = {'HTTP_AUTHORIZATION': 'Basic ' + base64.b64encode(b'erin:wrong').decode()}
+        for headers in ({}, credentials):
+            sync = anonymous.get('/api/transactions/analytics/', **headers)
+            asynchronous = anonymous.get('/api/async/transactions/analytics/', **headers)
+            self.assertEqual((sync.status_code, asynchronous.status_code), (403, 403))
+            self.assertEqual(json.loads(asynchronous.content), json.loads(sync.content))
+        self.assertEqual(anonymous.get('/api/async/balance/', **credentials).status_code, 403)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    SMS_BACKEND='core.sms_backends.LocmemBackend',
+)
+class AsyncNotificationTests(TestCase):
+    def test_delivers_both_channels(self):
+        user = make_user('frank', sms_notifications=True, phone_number='+15550100')
+        notification = enqueue_notification(user, 'Hello', 'Body')
+        sms_backends.outbox.clear()
+        stats = async_to_sync(aprocess_notification_batch)()
+        self.assertEqual((stats['sent'], stats['processed']), (1, 1))
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.SENT)
+        self.assertEqual((len(mail.outbox), len(sms_backends.outbox)), (1, 1))
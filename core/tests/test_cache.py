@@ -0,0 +1,71 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from core.models import Budget, Expense, Profile, Transaction
+from .utils import clear_caches, make_user
+
+
+class UserCacheTests(APITestCase):
+    # Cached results have no TTL, so every write has to bump the version of each user whose results it changes.
+    # Version bumps run on commit, hence captureOnCommitCallbacks around the writes.
+
+    def setUp(self):
+        clear_caches()
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+        staff = make_user('staff')
+        User.objects.filter(pk=staff.pk).update(is_staff=True)
+        self.staff = User.objects.get(pk=staff.pk)
+        self.client.force_authenticate(self.alice)
+
+    def balance(self):
+        return Decimal(str(self.client.get('/api/balance/').data['data']['balance']))
+
+    def budget_analytics(self):
+        return self.client.get('/api/budgets/analytics/').data['data']
+
+    def test_balance_follows_writes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(user=self.alice, amount=Decimal('10.00'), transaction_type=Transaction.DEPOSIT, description='a')
+        self.assertEqual(self.balance(), Decimal('10.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(user=self.alice, amount=Decimal('5.00'), transaction_type=Transaction.DEPOSIT, description='b')
+        self.assertEqual(self.balance(), Decimal('15.00'))
+
+    def test_moving_an_expense_invalidates_the_previous_owner(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            expense = Expense.objects.create(user=self.alice, category='Food', amount=Decimal('5.00'), date=timezone.localdate(), description='lunch')
+        self.assertEqual([row['category'] for row in self.budget_analytics()['spent_by_category']], ['Food'])
+
+        self.client.force_authenticate(self.staff)
+        payload = dict(self.client.get(f'/api/expenses/{expense.pk}/').data['data'], user=self.bob.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.put(f'/api/expenses/{expense.pk}/', payload, format='json').status_code, 200)
+
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.budget_analytics()['spent_by_category'], [])
+
+    def test_moving_a_budget_invalidates_the_previous_owner(self):
+        today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            budget = Budget.objects.create(user=self.alice, category='Rent', amount=Decimal('900.00'), start_date=today, end_date=today + timedelta(days=30))
+        self.assertEqual(len(self.budget_analytics()['budget_by_category']), 1)
+        budget.user = self.bob
+        with self.captureOnCommitCallbacks(execute=True):
+            budget.save()
+        self.assertEqual(self.budget_analytics()['budget_by_category'], [])
+
+    def test_reconcile_balances_invalidates_corrected_users(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(user=self.alice, amount=Decimal('10.00'), transaction_type=Transaction.DEPOSIT, description='a')
+        # Drift written without a version bump, and cached
+        Profile.objects.filter(user=self.alice).update(balance=Decimal('1.00'))
+        clear_caches()
+        self.assertEqual(self.balance(), Decimal('1.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_balances', stdout=StringIO())
+        self.assertEqual(self.balance(), Decimal('10.00'))
@@ -0,0 +1,68 @@
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from core.models import Notification, Profile, Transaction, sweep_low_balances
+from .utils import make_user
+
+
+class LowBalanceSweepTests(TestCase):
+    # Each drop below low_balance_threshold is alerted once, and alerts re-arm when the balance recovers
+
+    def setUp(self):
+        self.user = make_user('heidi', low_balance_threshold=Decimal('50.00'))
+        self.deposit('100.00')
+
+    def deposit(self, amount):
+        Transaction.objects.create(user=self.user, amount=Decimal(amount), transaction_type=Transaction.DEPOSIT, description='in')
+
+    def withdraw(self, amount):
+        Transaction.objects.create(user=self.user, amount=Decimal(amount), transaction_type=Transaction.WITHDRAWAL, description='out')
+
+    def alerts(self):
+        return list(Notification.objects.filter(user=self.user, subject="Low Balance Alert").values_list('message', flat=True))
+
+    def test_each_crossing_alerts_once(self):
+        self.assertEqual(sweep_low_balances(), (0, 0))
+        self.withdraw('70.00')
+        self.assertEqual(sweep_low_balances(), (1, 0))
+        self.assertEqual(len(self.alerts()), 1)
+        self.assertIn("Current balance: 30.00", self.alerts()[0])
+        self.assertTrue(Profile.objects.get(user=self.user).low_balance_alerted)
+
+        # Still below the threshold, further down or not: no new alert
+        self.withdraw('10.00')
+        self.assertEqual(sweep_low_balances(), (0, 0))
+        self.assertEqual(sweep_low_balances(), (0, 0))
+        self.assertEqual(len(self.alerts()), 1)
+
+    def test_alerts_rearm_after_recovery(self):
+        self.withdraw('70.00')
+        sweep_low_balances()
+        self.deposit('20.00')
+        self.assertEqual(sweep_low_balances(), (0, 1))
+        self.assertFalse(Profile.objects.get(user=self.user).low_balance_alerted)
+
+        self.withdraw('25.00')
+        self.assertEqual(sweep_low_balances(), (1, 0))
+        self.assertEqual(len(self.alerts()), 2)
+
+    def test_recovery_and_new_crossing_between_sweeps(self):
+        # A dip that recovers before the next sweep never alerts
+        self.withdraw('70.00')
+        self.deposit('70.00')
+        self.assertEqual(sweep_low_balances(), (0, 0))
+        self.assertEqual(self.alerts(), [])
+
+    def test_batches_cover_every_crossed_user(self):
+        users = [make_user(f'user{i}', low_balance_threshold=Decimal('10.00')) for i in range(5)]
+        self.assertEqual(sweep_low_balances(batch_size=2), (5, 0))
+        self.assertEqual(Notification.objects.filter(user__in=users).count(), 5)
+        self.assertEqual(sweep_low_balances(batch_size=2), (0, 0))
+
+    def test_command_runs_one_sweep(self):
+        self.withdraw('70.00')
+        out = StringIO()
+        call_command('sweep_low_balances', stdout=out)
+        self.assertIn("1 users alerted, 0 recovered", out.getvalue())
+        self.assertEqual(len(self.alerts()), 1)
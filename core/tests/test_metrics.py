@@ -0,0 +1,27 @@
+from django.test import TestCase, override_settings
+
+
+class MetricsAccessTests(TestCase):
+    # /metrics is private unless METRICS_ALLOWED_IPS opens it up
+
+    def scrape(self, address):
+        return self.client.get('/metrics', REMOTE_ADDR=address).status_code
+
+    def test_loopback_only_by_default(self):
+        self.assertEqual(self.scrape('127.0.0.1'), 200)
+        self.assertEqual(self.scrape('::1'), 200)
+        self.assertEqual(self.scrape('203.0.113.7'), 403)
+
+    @override_settings(METRICS_ALLOWED_IPS=None)
+    def test_unset_is_not_public(self):
+        self.assertEqual(self.scrape('203.0.113.7'), 403)
+        self.assertEqual(self.scrape('127.0.0.1'), 200)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.5'])
+    def test_listed_scrapers(self):
+        self.assertEqual(self.scrape('10.0.0.5'), 200)
+        self.assertEqual(self.scrape('127.0.0.1'), 403)
+
+    @override_settings(METRICS_ALLOWED_IPS='*')
+    def test_public_is_an_explicit_opt_in(self):
+        self.assertEqual(self.scrape('203.0.113.7'), 200)
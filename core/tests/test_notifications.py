@@ -0,0 +1,84 @@
+from datetime import timedelta
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from core.models import Notification, enqueue_notification
+from core.notifications import claim_batch, process_notification_batch, retry_delay
+from core.sms_backends import BaseSMSBackend
+from .utils import make_user
+
+
+class FailingSMSBackend(BaseSMSBackend):
+    def send(self, to, body):
+        raise ConnectionError('provider down')
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    SMS_BACKEND='core.sms_backends.LocmemBackend',
+    NOTIFICATION_RETRY_BACKOFF=30,
+    NOTIFICATION_RETRY_BACKOFF_MAX=3600,
+    NOTIFICATION_LEASE=300,
+)
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.user = make_user('dave', sms_notifications=True, phone_number='+15550100')
+
+    def test_delivers_both_channels(self):
+        notification = enqueue_notification(self.user, 'Hello', 'Body')
+        stats = process_notification_batch()
+        self.assertEqual((stats['sent'], stats['processed']), (1, 1))
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.SENT)
+        self.assertTrue(notification.sent_via_email and notification.sent_via_sms)
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(SMS_BACKEND='core.tests.test_notifications.FailingSMSBackend')
+    def test_failed_channel_is_retried_with_backoff_without_resending_the_other(self):
+        notification = enqueue_notification(self.user, 'Hello', 'Body')
+        before = timezone.now()
+        stats = process_notification_batch()
+        self.assertEqual(stats['retried'], 1)
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts), (Notification.PENDING, 1))
+        self.assertTrue(notification.sent_via_email)
+        self.assertFalse(notification.sent_via_sms)
+        self.assertIn('ConnectionError', notification.last_error)
+        self.assertGreaterEqual(notification.next_attempt_at, before + timedelta(seconds=30))
+
+        # Not due yet, so a second run picks nothing up
+        self.assertEqual(process_notification_batch()['processed'], 0)
+
+        Notification.objects.filter(pk=notification.pk).update(next_attempt_at=timezone.now())
+        with override_settings(SMS_BACKEND='core.sms_backends.LocmemBackend'):
+            self.assertEqual(process_notification_batch()['sent'], 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(SMS_BACKEND='core.tests.test_notifications.FailingSMSBackend')
+    def test_gives_up_after_max_attempts(self):
+        notification = enqueue_notification(self.user, 'Hello', 'Body')
+        for _ in range(3):
+            Notification.objects.filter(pk=notification.pk).update(next_attempt_at=timezone.now())
+            process_notification_batch(max_attempts=3)
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts), (Notification.FAILED, 3))
+
+    def test_claimed_batch_is_leased_until_it_expires(self):
+        notifications = [enqueue_notification(self.user, 'Hello', f'Body {index}') for index in range(3)]
+        now = timezone.now() + timedelta(seconds=1)
+        claimed = claim_batch(2, now)
+        self.assertEqual([notification.pk for notification in claimed], [notification.pk for notification in notifications[:2]])
+        self.assertEqual(
+            set(Notification.objects.filter(pk__in=[n.pk for n in claimed]).values_list('next_attempt_at', flat=True)),
+            {now + timedelta(seconds=300)},
+        )
+        # Another worker only gets the unclaimed row...
+        self.assertEqual([notification.pk for notification in claim_batch(10, now)], [notifications[2].pk])
+        self.assertEqual(claim_batch(10, now + timedelta(seconds=299)), [])
+        # ...until the leases of workers that never recorded their results run out
+        reclaimed = claim_batch(10, now + timedelta(seconds=301))
+        self.assertEqual({notification.pk for notification in reclaimed}, {notification.pk for notification in notifications})
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        self.assertEqual([retry_delay(attempts).total_seconds() for attempts in (1, 2, 3)], [30, 60, 120])
+        self.assertEqual(retry_delay(20), timedelta(seconds=3600))
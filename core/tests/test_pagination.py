@@ -0,0 +1,70 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from core.models import Transaction
+from .utils import clear_caches, make_user
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'PAGE_SIZE': 3})
+class CursorPaginationTests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = make_user('carol')
+        self.client.force_authenticate(self.user)
+        for index in range(8):
+            Transaction.objects.create(user=self.user, amount=Decimal(index + 1), transaction_type=Transaction.DEPOSIT, description=f'row {index}')
+        # Several rows share a timestamp, so the cursor has to break ties on id
+        now = timezone.now()
+        ids = list(Transaction.objects.filter(user=self.user).order_by('pk').values_list('pk', flat=True))
+        Transaction.objects.filter(pk__in=ids[:5]).update(date=now - timedelta(days=1))
+        Transaction.objects.filter(pk__in=ids[5:]).update(date=now)
+        self.newest_first = ids[5:][::-1] + ids[:5][::-1]
+
+    def walk(self, url):
+        pages, seen = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        return pages, seen
+
+    def test_pages_cover_every_row_once_across_ties(self):
+        pages, seen = self.walk('/api/transactions/')
+        self.assertEqual(seen, self.newest_first)
+        self.assertEqual([len(page['results']) for page in pages], [3, 3, 2])
+        self.assertIsNone(pages[0]['previous'])
+        self.assertIsNone(pages[-1]['next'])
+
+    def test_previous_link_returns_the_same_page(self):
+        first = self.client.get('/api/transactions/').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual([row['id'] for row in back['results']], [row['id'] for row in first['results']])
+        self.assertIsNotNone(back['next'])
+
+    def test_ascending_ordering(self):
+        _, seen = self.walk('/api/transactions/?ordering=date')
+        self.assertEqual(seen, self.newest_first[::-1])
+
+    def test_page_size_bounds(self):
+        response = self.client.get('/api/transactions/?page_size=5')
+        self.assertEqual(len(response.data['results']), 5)
+        for page_size in ('0', '-1', 'abc'):
+            response = self.client.get(f'/api/transactions/?page_size={page_size}')
+            self.assertEqual(len(response.data['results']), 3)
+        response = self.client.get('/api/transactions/?page_size=100000')
+        self.assertEqual(len(response.data['results']), 8)
+
+    def test_invalid_cursor_and_ordering(self):
+        self.assertEqual(self.client.get('/api/transactions/?cursor=not-a-cursor').status_code, 404)
+        self.assertEqual(self.client.get('/api/transactions/?ordering=amount').status_code, 400)
+        self.assertEqual(self.client.get('/api/transactions/?ordering=date,id').status_code, 400)
+
+    def test_empty_result(self):
+        response = self.client.get('/api/transactions/?amount_min=1000')
+        self.assertEqual(response.data, {'next': None, 'previous': None, 'results': []})
@@ -0,0 +1,64 @@
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+from core.models import Transaction
+from core.plan_utils import QueryTooExpensive, check_query_cost, sorts_full_scan
+from core.search_utils import search
+from .utils import clear_caches, make_user
+
+
+class SQLitePlanTests(TestCase):
+    def test_sorted_full_scans_only(self):
+        self.assertTrue(sorts_full_scan("4 0 0 SCAN core_transaction\n20 0 0 USE TEMP B-TREE FOR ORDER BY"))
+        self.assertTrue(sorts_full_scan("5 0 0 SCAN core_transaction USING INDEX transaction_date_idx\n9 0 0 USE TEMP B-TREE FOR ORDER BY"))
+        self.assertFalse(sorts_full_scan("4 0 0 SCAN core_transaction"))
+        self.assertFalse(sorts_full_scan("5 0 0 SCAN core_transaction USING INDEX transaction_date_idx"))
+        self.assertFalse(sorts_full_scan("5 0 0 SEARCH core_transaction USING INDEX transaction_user_date_idx (user_id=?)\n26 0 0 USE TEMP B-TREE FOR ORDER BY"))
+
+    def test_check_query_cost(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("SQLite plans")
+        user = make_user('grace')
+        accepted = [
+            Transaction.objects.order_by('pk')[:51],
+            Transaction.objects.filter(amount__gte=100).order_by('-date', '-pk')[:51],
+            Transaction.objects.filter(user=user, transaction_type=Transaction.DEPOSIT).order_by('-date', '-pk')[:51],
+            search(Transaction.objects.filter(user=user), 'coffee shop', user.pk)[:51],
+        ]
+        for queryset in accepted:
+            check_query_cost(queryset)
+        with self.assertRaises(QueryTooExpensive):
+            check_query_cost(Transaction.objects.order_by('description')[:51])
+
+
+class QueryCostGuardTests(APITestCase):
+    # Filtered list requests are EXPLAINed before the page query runs
+
+    def setUp(self):
+        clear_caches()
+        staff = make_user('staff')
+        User.objects.filter(pk=staff.pk).update(is_staff=True)
+        self.client.force_authenticate(User.objects.get(pk=staff.pk))
+        Transaction.objects.create(user=staff, amount=Decimal('150.00'), transaction_type=Transaction.DEPOSIT, description='coffee shop')
+
+    def test_indexed_list_requests_are_accepted(self):
+        for query in ('ordering=id', 'ordering=-id', 'amount_min=100', 'type=DEPOSIT', 'ordering=date&date_after=2024-01-01', 'q=coffee'):
+            response = self.client.get(f'/api/transactions/?{query}')
+            self.assertEqual(response.status_code, 200, query)
+
+    def test_unfiltered_requests_are_not_explained(self):
+        with mock.patch('core.pagination.check_query_cost') as check:
+            self.assertEqual(self.client.get('/api/transactions/?page_size=10').status_code, 200)
+        check.assert_not_called()
+
+    @override_settings(QUERY_COST_LIMIT=1000)
+    def test_planner_cost_over_the_limit_is_rejected(self):
+        with mock.patch('core.plan_utils.plan_cost', return_value=5000.0):
+            response = self.client.get('/api/transactions/?amount_min=100')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'].code, 'query_too_expensive')
+        with mock.patch('core.plan_utils.plan_cost', return_value=500.0):
+            self.assertEqual(self.client.get('/api/transactions/?amount_min=100').status_code, 200)
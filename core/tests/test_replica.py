@@ -0,0 +1,97 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+from core import db_routers
+from core.cache_utils import get_cache
+from core.models import Profile, Transaction
+from .utils import clear_caches, make_user
+
+# Its own alias, so a replica configured in the settings is left alone
+REPLICA = 'test_replica'
+
+
+@override_settings(REPLICA_DATABASE=REPLICA)
+class ReplicaRoutingTests(TestCase):
+    # A second SQLite database stands in for the replica. It is migrated but never replicated to, so its
+    # rows show which database served each read. It is added in setUpClass, hence '__all__' rather than
+    # naming an alias the test runner doesn't know about yet.
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.mkdtemp()
+        connections.databases[REPLICA] = {
+            **connections.databases['default'],
+            'NAME': os.path.join(cls.replica_dir, 'replica.sqlite3'),
+            'TEST': {'NAME': None, 'MIRROR': None},
+        }
+        call_command('migrate', database=REPLICA, verbosity=0, interactive=False)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        shutil.rmtree(cls.replica_dir)
+
+    def setUp(self):
+        clear_caches()
+        self.user = make_user('liam')
+        Transaction.objects.create(user=self.user, amount=Decimal('10.00'), transaction_type=Transaction.DEPOSIT, description='primary')
+        # The same user on the replica, with a history the primary doesn't have
+        User.objects.using(REPLICA).bulk_create([User.objects.get(pk=self.user.pk)])
+        Profile.objects.using(REPLICA).bulk_create([Profile(user_id=self.user.pk, balance=Decimal('99.00'))])
+        Transaction.objects.using(REPLICA).bulk_create([
+            Transaction(user_id=self.user.pk, amount=Decimal('99.00'), transaction_type=Transaction.DEPOSIT, description='replica'),
+        ])
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def descriptions(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)['data']
+        if isinstance(data, dict):
+            data = data['results']
+        return [row['description'] for row in data]
+
+    def statements(self):
+        today = timezone.localdate()
+        query = f'start_date={today - timedelta(days=1)}&end_date={today}'
+        return self.descriptions('/api/transactions/generate_statement/'), self.descriptions(f'/api/async/statement/?{query}')
+
+    def test_replica_safe_views_read_the_replica(self):
+        self.assertEqual(self.statements(), (['replica'], ['replica']))
+        # Views that aren't marked replica_safe keep reading the primary
+        self.assertEqual([row['description'] for row in self.client.get('/api/transactions/').data['results']], ['primary'])
+
+    def test_a_write_pins_the_user_to_the_primary(self):
+        payload = {'user': self.user.pk, 'amount': '5.00', 'transaction_type': Transaction.DEPOSIT, 'description': 'written'}
+        response = self.client.post('/api/transactions/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(db_routers.PIN_COOKIE, response.cookies)
+        self.assertFalse(Transaction.objects.using(REPLICA).filter(description='written').exists())
+
+        # Pinned by the cookie, then by the cache key alone (e.g. another client of the same user)
+        self.assertEqual(sorted(self.statements()[0]), ['primary', 'written'])
+        del self.client.cookies[db_routers.PIN_COOKIE]
+        self.assertEqual([sorted(rows) for rows in self.statements()], [['primary', 'written']] * 2)
+
+        # Once the pin expires, reads go back to the replica
+        get_cache().delete(db_routers.pin_key(self.user.pk))
+        clear_caches()
+        self.assertEqual(self.statements(), (['replica'], ['replica']))
+
+    @override_settings(REPLICA_DATABASE='reporting')
+    def test_unconfigured_replica_reads_the_primary(self):
+        self.assertEqual(self.statements(), (['primary'], ['primary']))
@@ -0,0 +1,59 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from core.models import Profile, Transaction
+from .utils import clear_caches, make_user
+
+
+class UserScopingTests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+        self.mine = Transaction.objects.create(user=self.alice, amount=Decimal('10.00'), transaction_type=Transaction.DEPOSIT, description='mine')
+        self.theirs = Transaction.objects.create(user=self.bob, amount=Decimal('20.00'), transaction_type=Transaction.DEPOSIT, description='theirs')
+        self.client.force_authenticate(self.alice)
+
+    def test_lists_and_details_only_show_own_rows(self):
+        response = self.client.get('/api/transactions/')
+        self.assertEqual([row['id'] for row in response.data['results']], [self.mine.pk])
+        self.assertEqual(self.client.get(f'/api/transactions/{self.theirs.pk}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/users/{self.bob.pk}/transactions/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/users/{self.alice.pk}/transactions/').status_code, 200)
+
+    def test_staff_can_read_nested_routes_of_other_users(self):
+        staff = make_user('staff')
+        User.objects.filter(pk=staff.pk).update(is_staff=True)
+        self.client.force_authenticate(User.objects.get(pk=staff.pk))
+        response = self.client.get(f'/api/users/{self.bob.pk}/transactions/')
+        self.assertEqual([row['id'] for row in response.data['results']], [self.theirs.pk])
+
+    def test_anonymous_reads_are_refused(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/transactions/').status_code, 403)
+
+    def test_writes_for_another_user_are_refused(self):
+        payload = {'user': self.bob.pk, 'amount': '5.00', 'transaction_type': Transaction.DEPOSIT, 'description': 'x'}
+        self.assertEqual(self.client.post('/api/transactions/', payload, format='json').status_code, 400)
+        self.assertEqual(self.client.post('/api/transactions/bulk_create/', [payload], format='json').status_code, 400)
+        self.assertFalse(Transaction.objects.filter(description='x').exists())
+
+    def test_bulk_update_of_another_users_row_is_not_found(self):
+        payload = [
+            {'id': self.mine.pk, 'user': self.alice.pk, 'amount': '1.00', 'transaction_type': Transaction.DEPOSIT, 'description': 'mine'},
+            {'id': self.theirs.pk, 'user': self.alice.pk, 'amount': '1.00', 'transaction_type': Transaction.DEPOSIT, 'description': 'taken'},
+        ]
+        response = self.client.put('/api/transactions/bulk_update/', payload, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Transaction.objects.get(pk=self.mine.pk).amount, Decimal('10.00'))
+        self.assertEqual(Transaction.objects.get(pk=self.theirs.pk).user_id, self.bob.pk)
+
+    def test_bulk_update_cannot_hand_rows_to_another_user(self):
+        payload = [{'id': self.mine.pk, 'user': self.bob.pk, 'amount': '10.00', 'transaction_type': Transaction.DEPOSIT, 'description': 'mine'}]
+        self.assertEqual(self.client.put('/api/transactions/bulk_update/', payload, format='json').status_code, 400)
+        self.assertEqual(Transaction.objects.get(pk=self.mine.pk).user_id, self.alice.pk)
+
+    def test_bulk_update_of_own_rows(self):
+        payload = [{'id': self.mine.pk, 'user': self.alice.pk, 'amount': '15.00', 'transaction_type': Transaction.DEPOSIT, 'description': 'mine'}]
+        self.assertEqual(self.client.put('/api/transactions/bulk_update/', payload, format='json').status_code, 200)
+        self.assertEqual(Profile.objects.get(user=self.alice).balance, Decimal('15.00'))
@@ -0,0 +1,101 @@
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from core.models import Expense, SearchTerm, Transaction, ingest_transactions, update_transactions, uses_search_index
+from core.search_utils import search
+from .utils import clear_caches, make_user
+
+
+class SearchIndexTests(TestCase):
+    # The SearchTerm rows follow every write path that can change a description
+
+    def setUp(self):
+        if not uses_search_index():
+            self.skipTest("MySQL searches through its FULLTEXT indexes")
+        self.user = make_user('ivan')
+
+    def transaction(self, description):
+        return Transaction(user=self.user, amount=Decimal('5.00'), transaction_type=Transaction.PAYMENT, description=description)
+
+    def terms(self, instance, source=SearchTerm.TRANSACTION):
+        return dict(SearchTerm.objects.filter(source=source, object_id=instance.pk).values_list('term', 'frequency'))
+
+    def found(self, query, model=Transaction):
+        return list(search(model.objects.filter(user=self.user), query, self.user.pk).values_list('pk', flat=True))
+
+    def test_save_indexes_and_reindexes(self):
+        transaction = self.transaction('Coffee at the coffee shop')
+        transaction.save()
+        self.assertEqual(self.terms(transaction), {'coffee': 2, 'the': 1, 'shop': 1})
+        transaction.description = 'Train ticket'
+        transaction.save()
+        self.assertEqual(self.terms(transaction), {'train': 1, 'ticket': 1})
+        self.assertEqual(self.found('coffee'), [])
+        self.assertEqual(self.found('ticket'), [transaction.pk])
+
+    def test_expenses_are_indexed_separately(self):
+        expense = Expense.objects.create(user=self.user, category='Food', amount=Decimal('3.00'), date=timezone.localdate(), description='coffee beans')
+        self.assertEqual(self.terms(expense, SearchTerm.EXPENSE), {'coffee': 1, 'beans': 1})
+        self.assertEqual(self.found('coffee', Expense), [expense.pk])
+        self.assertEqual(self.found('coffee'), [])
+
+    def test_bulk_ingest_and_update(self):
+        first, second = ingest_transactions([self.transaction('grocery run'), self.transaction('coffee shop')])
+        self.assertEqual(self.terms(first), {'grocery': 1, 'run': 1})
+        self.assertEqual(self.found('coffee'), [second.pk])
+
+        updated, missing = update_transactions({first.pk: {'description': 'coffee to go'}})
+        self.assertEqual(missing, [])
+        self.assertEqual(self.terms(first), {'coffee': 1})
+        self.assertEqual(sorted(self.found('coffee')), sorted([first.pk, second.pk]))
+        self.assertEqual(self.found('grocery'), [])
+
+        # Updates that don't touch the description leave the index alone
+        update_transactions({second.pk: {'amount': Decimal('7.00')}})
+        self.assertEqual(self.terms(second), {'coffee': 1, 'shop': 1})
+
+    def test_delete_removes_terms(self):
+        transaction = self.transaction('coffee shop')
+        transaction.save()
+        pk = transaction.pk
+        transaction.delete()
+        self.assertFalse(SearchTerm.objects.filter(object_id=pk).exists())
+        self.assertEqual(self.found('coffee'), [])
+
+    def test_ranking_and_every_word_must_match(self):
+        once = self.transaction('coffee shop')
+        twice = self.transaction('coffee and more coffee shop')
+        other = self.transaction('coffee beans')
+        for transaction in (once, twice, other):
+            transaction.save()
+        self.assertEqual(self.found('coffee shop'), [twice.pk, once.pk])
+        # Equal ranks fall back to newest first
+        self.assertEqual(self.found('coffee'), [twice.pk, other.pk, once.pk])
+        self.assertEqual(self.found('a an'), [])
+
+    def test_rebuild_search_index(self):
+        transaction = self.transaction('coffee shop')
+        transaction.save()
+        SearchTerm.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.terms(transaction), {'coffee': 1, 'shop': 1})
+
+
+class SearchAPITests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = make_user('judy')
+        other = make_user('mallory')
+        self.client.force_authenticate(self.user)
+        self.mine = Transaction.objects.create(user=self.user, amount=Decimal('4.00'), transaction_type=Transaction.PAYMENT, description='coffee shop')
+        Transaction.objects.create(user=self.user, amount=Decimal('9.00'), transaction_type=Transaction.PAYMENT, description='book shop')
+        Transaction.objects.create(user=other, amount=Decimal('4.00'), transaction_type=Transaction.PAYMENT, description='coffee shop')
+
+    def test_q_searches_the_users_own_rows(self):
+        response = self.client.get('/api/transactions/?q=coffee+shop')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], [self.mine.pk])
+        self.assertEqual(len(self.client.get('/api/transactions/?q=shop').data['results']), 2)
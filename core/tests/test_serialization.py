@@ -0,0 +1,74 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from core.models import Budget, Expense, Investment, SavingsGoal, Transaction
+from core.serialization_utils import row_serializer
+from core.serializers import (
+    BudgetSerializer, ExpenseSerializer, InvestmentSerializer, ProfileSerializer, SavingsGoalSerializer,
+    TransactionSerializer, UserSerializer,
+)
+from .utils import clear_caches, make_user
+
+
+class RowSerializerTests(TestCase):
+    # The compiled values() path produces exactly what the serializer does
+
+    def setUp(self):
+        self.user = make_user('mia')
+        today = timezone.localdate()
+        Transaction.objects.create(user=self.user, amount=Decimal('12.5'), transaction_type=Transaction.DEPOSIT, description='paycheck')
+        Transaction.objects.create(user=self.user, amount=Decimal('0.10'), transaction_type=Transaction.PAYMENT, description='')
+        Investment.objects.create(user=self.user, investment_type='Stocks', amount=Decimal('1000'), date=timezone.now() - timedelta(days=400))
+        Budget.objects.create(user=self.user, category='Food', amount=Decimal('300.00'), start_date=today, end_date=today + timedelta(days=30))
+        Expense.objects.create(user=self.user, category='Food', amount=Decimal('3.333'), date=today, description='coffee')
+        SavingsGoal.objects.create(user=self.user, goal_name='Car', target_amount=Decimal('5000'), current_amount=Decimal('0'), start_date=today, end_date=today + timedelta(days=365))
+
+    def assertCompiledMatches(self, serializer_class, queryset, fields=None):
+        to_dicts = row_serializer(serializer_class(), fields)
+        self.assertIsNotNone(to_dicts, serializer_class.__name__)
+        expected = serializer_class(queryset, many=True).data
+        if fields is not None:
+            expected = [{name: row[name] for name in fields} for row in expected]
+        self.assertEqual(to_dicts(queryset.values(*to_dicts.columns)), [dict(row) for row in expected])
+
+    def test_every_compiled_serializer_matches(self):
+        cases = [
+            (TransactionSerializer, Transaction), (InvestmentSerializer, Investment), (BudgetSerializer, Budget),
+            (ExpenseSerializer, Expense), (SavingsGoalSerializer, SavingsGoal), (UserSerializer, User),
+        ]
+        for serializer_class, model in cases:
+            with self.subTest(serializer_class.__name__):
+                self.assertCompiledMatches(serializer_class, model.objects.order_by('pk'))
+
+    def test_datetimes_follow_the_active_timezone(self):
+        for zone in ('UTC', 'America/New_York', 'Asia/Kolkata'):
+            with self.subTest(zone), timezone.override(zone):
+                self.assertCompiledMatches(TransactionSerializer, Transaction.objects.order_by('pk'))
+                self.assertCompiledMatches(InvestmentSerializer, Investment.objects.order_by('pk'))
+
+    def test_sparse_fields(self):
+        self.assertCompiledMatches(TransactionSerializer, Transaction.objects.order_by('pk'), ['id', 'amount', 'date'])
+        self.assertEqual(row_serializer(TransactionSerializer(), ['amount']).columns, ['amount'])
+
+    def test_nested_serializers_are_not_compiled(self):
+        self.assertIsNone(row_serializer(ProfileSerializer()))
+
+
+class CompiledListTests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = make_user('noah')
+        self.client.force_authenticate(self.user)
+        for amount in ('1.5', '20', '300.25'):
+            Transaction.objects.create(user=self.user, amount=Decimal(amount), transaction_type=Transaction.DEPOSIT, description=f'row {amount}')
+
+    def test_list_matches_the_serializer(self):
+        response = self.client.get('/api/transactions/')
+        self.assertEqual(response.status_code, 200)
+        expected = TransactionSerializer(Transaction.objects.order_by('-date', '-pk'), many=True).data
+        self.assertEqual(response.data['results'], [dict(row) for row in expected])
+        response = self.client.get('/api/transactions/?fields=id,amount')
+        self.assertEqual(response.data['results'], [{'id': row['id'], 'amount': row['amount']} for row in expected])
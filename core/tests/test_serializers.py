@@ -0,0 +1,73 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from core.models import Transaction
+from core.serializers import BudgetSerializer, ExpenseSerializer, TransactionSerializer
+from .utils import clear_caches, make_user
+
+
+class BatchedValidationTests(TestCase):
+    # many=True payloads resolve their user ids with one query, however many rows they have
+
+    def setUp(self):
+        self.users = [make_user(f'user{index}') for index in range(3)]
+
+    def rows(self, count, user_ids=None):
+        user_ids = user_ids or [user.pk for user in self.users]
+        return [
+            {'user': user_ids[index % len(user_ids)], 'amount': '5.00', 'transaction_type': Transaction.DEPOSIT, 'description': f'row {index}'}
+            for index in range(count)
+        ]
+
+    def test_one_query_for_the_whole_payload(self):
+        serializer = TransactionSerializer(data=self.rows(30), many=True)
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual([row['user'] for row in serializer.validated_data[:3]], self.users)
+
+    def test_other_batched_serializers(self):
+        today = timezone.localdate()
+        budgets = [
+            {'user': user.pk, 'category': 'Food', 'amount': '100.00', 'start_date': today, 'end_date': today + timedelta(days=30)}
+            for user in self.users * 4
+        ]
+        expenses = [{'user': user.pk, 'category': 'Food', 'amount': '3.00', 'date': today, 'description': 'lunch'} for user in self.users * 4]
+        for serializer_class, data in ((BudgetSerializer, budgets), (ExpenseSerializer, expenses)):
+            serializer = serializer_class(data=data, many=True)
+            with self.assertNumQueries(1):
+                self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_unknown_ids_are_reported_together(self):
+        serializer = TransactionSerializer(data=self.rows(6, [self.users[0].pk, 999, 998]), many=True)
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors, {'user': ["Users with IDs 998, 999 do not exist."]})
+
+    def test_wrong_typed_ids_keep_the_per_row_error(self):
+        serializer = TransactionSerializer(data=self.rows(2, [self.users[0].pk, 'abc']), many=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors[0], {})
+        self.assertEqual(serializer.errors[1]['user'][0].code, 'incorrect_type')
+
+    def test_single_objects_are_unchanged(self):
+        serializer = TransactionSerializer(data=self.rows(1, [999])[0])
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['user'][0].code, 'does_not_exist')
+
+
+class BulkCreateValidationTests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = make_user('kim')
+        self.client.force_authenticate(self.user)
+
+    def test_unknown_users_are_rejected_before_anything_is_written(self):
+        payload = [
+            {'user': self.user.pk, 'amount': '5.00', 'transaction_type': Transaction.DEPOSIT, 'description': 'ok'},
+            {'user': 999, 'amount': '5.00', 'transaction_type': Transaction.DEPOSIT, 'description': 'missing'},
+        ]
+        response = self.client.post('/api/transactions/bulk_create/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Transaction.objects.exists())
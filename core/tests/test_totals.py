@@ -0,0 +1,155 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.models import (
+    Profile, Transaction, DailyTransactionRollup, Expense, DailyExpenseRollup,
+    balance_aggregate, ingest_transactions, update_transactions,
+)
+from .utils import make_user
+
+
+class MaterializedTotalsTests(TestCase):
+    # Profile.balance and the daily rollups are maintained incrementally by every write path; each test
+    # compares them with a rebuild from the rows themselves
+
+    def setUp(self):
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+
+    def assertTotalsMatchRows(self):
+        for profile in Profile.objects.all():
+            expected = Transaction.objects.filter(user_id=profile.user_id).aggregate(total=balance_aggregate())['total'] or Decimal(0)
+            self.assertEqual(profile.balance, expected)
+
+        expected = {
+            (row['user_id'], row['day'].date(), row['transaction_type']): (row['total'], row['count'])
+            for row in Transaction.objects.annotate(day=TruncDay('date'))
+            .values('user_id', 'day', 'transaction_type').annotate(total=Sum('amount'), count=Count('id'))
+        }
+        stored = {
+            (row.user_id, row.day, row.transaction_type): (row.total_amount, row.count)
+            for row in DailyTransactionRollup.objects.exclude(count=0)
+        }
+        self.assertEqual(stored, expected)
+
+        expected = {
+            (row['user_id'], row['date'], row['category']): (row['total'], row['count'])
+            for row in Expense.objects.values('user_id', 'date', 'category').annotate(total=Sum('amount'), count=Count('id'))
+        }
+        stored = {
+            (row.user_id, row.day, row.category): (row.total_amount, row.count)
+            for row in DailyExpenseRollup.objects.exclude(count=0)
+        }
+        self.assertEqual(stored, expected)
+
+    def test_save_create_update_and_delete(self):
+        deposit = Transaction.objects.create(user=self.alice, amount=Decimal('100.00'), transaction_type=Transaction.DEPOSIT, description='salary')
+        withdrawal = Transaction.objects.create(user=self.alice, amount=Decimal('30.00'), transaction_type=Transaction.WITHDRAWAL, description='rent')
+        Transaction.objects.create(user=self.alice, amount=Decimal('5.00'), transaction_type=Transaction.PAYMENT, description='coffee')
+        self.assertEqual(Profile.objects.get(user=self.alice).balance, Decimal('70.00'))
+        self.assertTotalsMatchRows()
+
+        deposit.amount = Decimal('150.00')
+        deposit.save()
+        withdrawal.transaction_type = Transaction.DEPOSIT
+        withdrawal.save()
+        self.assertEqual(Profile.objects.get(user=self.alice).balance, Decimal('180.00'))
+        self.assertTotalsMatchRows()
+
+        deposit.delete()
+        self.assertEqual(Profile.objects.get(user=self.alice).balance, Decimal('30.00'))
+        self.assertTotalsMatchRows()
+
+    def test_moving_a_transaction_between_users(self):
+        transaction = Transaction.objects.create(user=self.alice, amount=Decimal('40.00'), transaction_type=Transaction.DEPOSIT, description='gift')
+        transaction.user = self.bob
+        transaction.save()
+        self.assertEqual(Profile.objects.get(user=self.alice).balance, Decimal('0.00'))
+        self.assertEqual(Profile.objects.get(user=self.bob).balance, Decimal('40.00'))
+        self.assertTotalsMatchRows()
+
+    def test_stale_profile_save_keeps_balance(self):
+        profile = Profile.objects.get(user=self.alice)
+        Transaction.objects.create(user=self.alice, amount=Decimal('25.00'), transaction_type=Transaction.DEPOSIT, description='refund')
+        profile.phone_number = '+15550100'
+        profile.save()
+        self.assertEqual(Profile.objects.get(user=self.alice).balance, Decimal('25.00'))
+
+    def test_bulk_ingest_update_and_queryset_delete(self):
+        ingest_transactions([
+            Transaction(user=user, amount=Decimal(amount), transaction_type=kind, description='bulk')
+            for user, amount, kind in [
+                (self.alice, '10.00', Transaction.DEPOSIT),
+                (self.alice, '20.00', Transaction.DEPOSIT),
+                (self.alice, '7.50', Transaction.WITHDRAWAL),
+                (self.bob, '99.99', Transaction.DEPOSIT),
+                (self.bob, '12.00', Transaction.TRANSFER),
+            ]
+        ], batch_size=2)
+        self.assertEqual(Profile.objects.get(user=self.alice).balance, Decimal('22.50'))
+        self.assertTotalsMatchRows()
+
+        ids = list(Transaction.objects.filter(user=self.alice).order_by('pk').values_list('pk', flat=True))
+        updated, missing = update_transactions({
+            ids[0]: {'amount': Decimal('11.00')},
+            ids[2]: {'transaction_type': Transaction.DEPOSIT},
+        })
+        self.assertEqual((len(updated), missing), (2, []))
+        self.assertEqual(Profile.objects.get(user=self.alice).balance, Decimal('38.50'))
+        self.assertTotalsMatchRows()
+
+        Transaction.objects.filter(user=self.bob).delete()
+        self.assertEqual(Profile.objects.get(user=self.bob).balance, Decimal('0.00'))
+        self.assertTotalsMatchRows()
+
+    def test_update_with_missing_or_foreign_ids_writes_nothing(self):
+        mine = Transaction.objects.create(user=self.alice, amount=Decimal('10.00'), transaction_type=Transaction.DEPOSIT, description='a')
+        theirs = Transaction.objects.create(user=self.bob, amount=Decimal('10.00'), transaction_type=Transaction.DEPOSIT, description='b')
+        updated, missing = update_transactions({mine.pk: {'amount': Decimal('1.00')}, theirs.pk: {'amount': Decimal('1.00')}}, user_id=self.alice.pk)
+        self.assertEqual((updated, missing), ([], [theirs.pk]))
+        updated, missing = update_transactions({mine.pk: {'amount': Decimal('1.00')}, 0: {'amount': Decimal('1.00')}})
+        self.assertEqual((updated, missing), ([], [0]))
+        self.assertEqual(Transaction.objects.get(pk=mine.pk).amount, Decimal('10.00'))
+        self.assertTotalsMatchRows()
+
+    def test_expense_rollups(self):
+        today = timezone.localdate()
+        lunch = Expense.objects.create(user=self.alice, category='Food', amount=Decimal('12.00'), date=today, description='lunch')
+        Expense.objects.create(user=self.alice, category='Food', amount=Decimal('8.00'), date=today, description='dinner')
+        self.assertTotalsMatchRows()
+
+        lunch.category = 'Work'
+        lunch.date = today - timedelta(days=1)
+        lunch.save()
+        self.assertTotalsMatchRows()
+
+        Expense.objects.filter(user=self.alice).delete()
+        self.assertTotalsMatchRows()
+
+    def test_deleting_a_user_with_transactions_and_expenses(self):
+        Transaction.objects.create(user=self.alice, amount=Decimal('10.00'), transaction_type=Transaction.DEPOSIT, description='a')
+        Expense.objects.create(user=self.alice, category='Food', amount=Decimal('4.00'), date=timezone.localdate(), description='b')
+        Transaction.objects.create(user=self.bob, amount=Decimal('3.00'), transaction_type=Transaction.DEPOSIT, description='c')
+        user_id = self.alice.pk
+        self.alice.delete()
+        self.assertFalse(DailyTransactionRollup.objects.filter(user_id=user_id).exists())
+        self.assertFalse(DailyExpenseRollup.objects.filter(user_id=user_id).exists())
+        self.assertTotalsMatchRows()
+
+    def test_deleting_users_through_the_api_and_a_queryset(self):
+        for user in (self.alice, self.bob):
+            Transaction.objects.create(user=user, amount=Decimal('10.00'), transaction_type=Transaction.WITHDRAWAL, description='a')
+            Expense.objects.create(user=user, category='Food', amount=Decimal('4.00'), date=timezone.localdate(), description='b')
+        staff = make_user('staff')
+        User.objects.filter(pk=staff.pk).update(is_staff=True)
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=staff.pk))
+        self.assertEqual(client.delete(f'/api/users/{self.alice.pk}/').status_code, 204)
+        User.objects.filter(pk=self.bob.pk).delete()
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(DailyTransactionRollup.objects.exists() or DailyExpenseRollup.objects.exists())
@@ -0,0 +1,17 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from core.models import Profile
+
+
+def make_user(username, **profile):
+    # User plus the Profile the post_save signal creates, with any profile fields set
+    user = User.objects.create_user(username, f'{username}@example.com', 'secret')
+    if profile:
+        Profile.objects.filter(user=user).update(**profile)
+    return user
+
+
+def clear_caches():
+    # Cached results are keyed by user id and nothing commits inside a TestCase, so start every test empty
+    for cache in caches.all():
+        cache.clear()
@@ -1,13 +1,142 @@
-from twilio.rest import Client
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
 
+_client = None
+_client_lock = threading.Lock()
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_client():
+    # One Client per process: its pooled requests.Session keeps TLS connections to the API alive
+    # across messages instead of handshaking for every SMS.
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # twilio (and requests) load on the first SMS rather than at worker boot
+                from requests.adapters import HTTPAdapter
+                from twilio.http.http_client import TwilioHttpClient
+                from twilio.rest import Client
+                http_client = TwilioHttpClient(pool_connections=True, timeout=getattr(settings, 'TWILIO_TIMEOUT', 10))
+                pool_size = getattr(settings, 'TWILIO_MAX_CONCURRENCY', 8)
+                http_client.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+                _client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, http_client=http_client)
+    return _client
+
+
 def send_sms(to_phone_number, message):
-    client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-    
+    client = get_client()
+
     message = client.messages.create(
         body=message,
         from_=settings.TWILIO_PHONE_NUMBER,
         to=to_phone_number
     )
-    
-    return message.sid
\ No newline at end of file
+
+    return message.sid
+
+
+class RateLimiter:
+    # Token bucket shared by dispatcher threads and event loops alike; rate is messages per second.
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        # Takes a token and returns 0, or returns how long to wait before trying again. The lock is never
+        # held while waiting, so coroutines can call this too.
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        wait = self.try_acquire()
+        while wait:
+            time.sleep(wait)
+            wait = self.try_acquire()
+
+    async def aacquire(self):
+        wait = self.try_acquire()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self.try_acquire()
+
+
+def get_rate_limiter():
+    # One bucket per process for TWILIO_RATE_LIMIT, so batches sent at the same time (threads, the async
+    # worker) share the account's rate instead of each getting all of it.
+    global _rate_limiter
+    rate = getattr(settings, 'TWILIO_RATE_LIMIT', None)
+    if not rate:
+        return None
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(rate)
+    return _rate_limiter
+
+
+def send_sms_batch(messages, max_workers=None, limiter=None, send=send_sms):
+    # Sends (to_phone_number, body) pairs concurrently over the shared client, paced by `limiter` (the
+    # process-wide one by default). Returns one {'to', 'sid', 'error'} dict per message in input order;
+    # a failure never aborts the batch.
+    messages = list(messages)
+    if not messages:
+        return []
+    max_workers = max_workers or getattr(settings, 'TWILIO_MAX_CONCURRENCY', 8)
+    limiter = limiter or get_rate_limiter()
+
+    def dispatch(item):
+        to, body = item
+        if limiter:
+            limiter.acquire()
+        try:
+            return {'to': to, 'sid': send(to, body), 'error': None}
+        except Exception as exc:
+            return {'to': to, 'sid': None, 'error': exc}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(messages))) as executor:
+        return list(executor.map(dispatch, messages))
+
+
+async def asend_sms_batch(messages, max_concurrency=None, limiter=None):
+    # Async twin of send_sms_batch: one aiohttp session for the batch and a semaphore instead of threads,
+    # so a single event loop keeps many requests to the API in flight.
+    messages = list(messages)
+    if not messages:
+        return []
+    from twilio.http.async_http_client import AsyncTwilioHttpClient
+    from twilio.rest import Client
+
+    max_concurrency = max_concurrency or getattr(settings, 'TWILIO_MAX_CONCURRENCY', 8)
+    limiter = limiter or get_rate_limiter()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    http_client = AsyncTwilioHttpClient(timeout=getattr(settings, 'TWILIO_TIMEOUT', 10))
+    client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, http_client=http_client)
+
+    async def dispatch(to, body):
+        async with semaphore:
+            if limiter:
+                await limiter.aacquire()
+            try:
+                message = await client.messages.create_async(body=body, from_=settings.TWILIO_PHONE_NUMBER, to=to)
+                return {'to': to, 'sid': message.sid, 'error': None}
+            except Exception as exc:
+                return {'to': to, 'sid': None, 'error': exc}
+
+    try:
+        return await asyncio.gather(*(dispatch(to, body) for to, body in messages))
+    finally:
+        await http_client.close()
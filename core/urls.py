@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework_nested import routers
 from .views import UserViewSet, ProfileViewSet, TransactionViewSet, InvestmentViewSet, BudgetViewSet, ExpenseViewSet, SavingsGoalViewSet, FinancialAdviceView, BalanceView, StatementView
+from .async_views import AsyncBalanceView, AsyncStatementView, AsyncTransactionAnalyticsView, AsyncInvestmentAnalyticsView, AsyncBudgetAnalyticsView
 
 router = routers.DefaultRouter()
 router.register(r'users', UserViewSet)
@@ -26,4 +27,10 @@ urlpatterns = [
     path('financial-advice/', FinancialAdviceView.as_view(), name='financial-advice'),
     path('balance/', BalanceView.as_view(), name='balance'),
     path('statement/', StatementView.as_view(), name='statement'),
+    # Async twins of the endpoints above, for ASGI deployments (bx_api.asgi)
+    path('async/balance/', AsyncBalanceView.as_view(), name='async-balance'),
+    path('async/statement/', AsyncStatementView.as_view(), name='async-statement'),
+    path('async/transactions/analytics/', AsyncTransactionAnalyticsView.as_view(), name='async-transaction-analytics'),
+    path('async/investments/analytics/', AsyncInvestmentAnalyticsView.as_view(), name='async-investment-analytics'),
+    path('async/budgets/analytics/', AsyncBudgetAnalyticsView.as_view(), name='async-budget-analytics'),
 ]
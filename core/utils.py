@@ -1,3 +1,4 @@
+from rest_framework.exceptions import NotAuthenticated, NotFound
 from rest_framework.response import Response
 
 def standard_response(success=True, message=None, data=None, status=200):
@@ -7,6 +8,20 @@ def standard_response(success=True, message=None, data=None, status=200):
         'data': data
     }, status=status)
 
-
-
-
+def scoped_user_id(user, user_pk=None):
+    # The only user whose rows a request may read or write: the user_pk of a nested /users/<user_pk>/...
+    # route, and always the signed-in user for non-staff accounts. None means no restriction (staff only);
+    # anonymous callers get a 401 rather than every account's rows.
+    if user is None or not user.is_authenticated:
+        raise NotAuthenticated()
+    if user_pk is not None:
+        try:
+            user_pk = int(user_pk)
+        except (TypeError, ValueError):
+            raise NotFound("User not found.")
+    if not user.is_staff:
+        # 404 rather than 403, so other accounts' ids aren't confirmed
+        if user_pk is not None and user_pk != user.pk:
+            raise NotFound("User not found.")
+        return user.pk
+    return user_pk
@@ -1,30 +1,114 @@
-from rest_framework import viewsets, status, filters
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.negotiation import DefaultContentNegotiation
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from django.http import HttpResponse
-from django.db.models import Sum, F
-from .models import Profile, Transaction, Investment, Budget, Expense, SavingsGoal
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Profile, Transaction, Investment, Budget, Expense, SavingsGoal, DailyTransactionRollup, DailyExpenseRollup, ingest_transactions, update_transactions
 from .serializers import UserSerializer, ProfileSerializer, TransactionSerializer, InvestmentSerializer, BudgetSerializer, ExpenseSerializer, SavingsGoalSerializer
-from .utils import standard_response
+from .utils import scoped_user_id, standard_response
+from .visualization_utils import chart_response
+from .export_utils import iterate_values, stream_csv
+from .pdf_utils import statement_pdf_response
 from django.utils.dateparse import parse_date
-from .visualization_utils import generate_bar_chart, generate_pie_chart, generate_line_chart
+from .analytics_utils import build_analytics, render_params, rollup_totals, series_chart_response
+from .cache_utils import cached_for_user
+from .db_routers import replica_safe
+from .filters import TransactionFilter, InvestmentFilter, BudgetFilter, ExpenseFilter, SavingsGoalFilter, IndexedOrderingFilter
+from .metrics import render_metrics
+from .pagination import DateIdCursorPagination
+from .search_utils import FullTextSearchFilter
+from .serialization_utils import row_serializer, sparse_fields
 from django.contrib.auth.models import User
 from .twilio_utils import send_sms
-from io import BytesIO
-import csv
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from rest_framework.exceptions import NotFound
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 
-class CustomBaseViewSet(viewsets.ModelViewSet):
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = '__all__'
-    search_fields = '__all__'
-    ordering_fields = '__all__'
-    ordering = ['id']
+class PaginatedListMixin:
+    def list(self, request, *args, **kwargs):
+        return Response(self.paginated_data(self.filter_queryset(self.get_queryset())))
+
+    def paginated_data(self, queryset):
+        # Cursor-paginated list data for list() and the custom list actions. ?fields= picks the columns; when the
+        # serializer is all plain columns, rows are read with values() and a compiled row function
+        # (core.serialization_utils) instead of building a model and a serializer per row.
+        serializer = self.get_serializer()
+        fields = sparse_fields(self.request, [field.field_name for field in serializer._readable_fields])
+        to_dicts = row_serializer(serializer, fields)
+        if to_dicts is not None:
+            queryset = queryset.values(*self.row_columns(queryset, to_dicts.columns))
+            page = self.paginate_queryset(queryset)
+            if page is None:
+                return to_dicts(queryset)
+            return self.get_paginated_response(to_dicts(page)).data
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(queryset if page is None else page, many=True)
+        if fields is not None:
+            for name in list(serializer.child.fields):
+                if name not in fields:
+                    serializer.child.fields.pop(name)
+        if page is None:
+            return serializer.data
+        return self.get_paginated_response(serializer.data).data
+
+    def row_columns(self, queryset, columns):
+        # The paginator reads each row's cursor position (its cursor field and id) from the values() dicts
+        extra = ['id']
+        if isinstance(self.paginator, DateIdCursorPagination):
+            extra.append(self.paginator.get_cursor_ordering(queryset, self)[0])
+        return list(dict.fromkeys(columns + [name for name in extra if name != 'pk']))
+
+class UserScopedMixin:
+    # Filters every queryset to the user from scoped_user_id(): the user_pk of nested /users/<user_pk>/...
+    # routes, and the signed-in user for non-staff accounts. List, detail and custom actions then only read
+    # that user's index range. Querysets not built from get_queryset() (rollups) go through scope_queryset().
+    user_field = 'user_id'
+
+    def get_scope_user_id(self):
+        if not hasattr(self, '_scope_user_id'):
+            self._scope_user_id = scoped_user_id(self.request.user, self.kwargs.get('user_pk'))
+        return self._scope_user_id
+
+    def scope_queryset(self, queryset, user_field=None):
+        user_id = self.get_scope_user_id()
+        if user_id is None:
+            return queryset
+        return queryset.filter(**{user_field or self.user_field: user_id})
+
+    def get_queryset(self):
+        return self.scope_queryset(super().get_queryset())
+
+    def check_scope_user(self, items):
+        # Writes may only name the scoped user; items are validated_data dicts
+        users = {item['user'].pk for item in items if isinstance(item.get('user'), User)}
+        if not users:
+            return
+        user_id = self.get_scope_user_id()
+        if user_id is not None and users != {user_id}:
+            raise ValidationError({'user': [f"Rows can only be written for user {user_id}."]})
+
+    def perform_create(self, serializer):
+        self.check_scope_user([serializer.validated_data])
+        super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        self.check_scope_user([serializer.validated_data])
+        super().perform_update(serializer)
+
+class CustomBaseViewSet(UserScopedMixin, PaginatedListMixin, viewsets.ModelViewSet):
+    # Whitelisted filters only (core.filters): each viewset sets a filterset_class, and ordering_fields lists
+    # the indexed keys ?ordering= may page on
+    filter_backends = [DjangoFilterBackend, IndexedOrderingFilter]
+    ordering_fields = ['id']
 
     def get_model_name(self):
         return self.queryset.model.__name__
@@ -76,28 +160,33 @@ class CustomBaseViewSet(viewsets.ModelViewSet):
 class UserViewSet(CustomBaseViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    user_field = 'pk'
+    cursor_field = 'date_joined'
 
 class ProfileViewSet(CustomBaseViewSet):
     queryset = Profile.objects.all()
     serializer_class = ProfileSerializer
+    cursor_field = 'pk'
 
     @action(detail=False, methods=['get'])
-    def active(self, request):
-        active_profiles = self.queryset.filter(is_active=True)
-        serializer = self.get_serializer(active_profiles, many=True)
+    def active(self, request, user_pk=None):
+        active_profiles = self.get_queryset().filter(user__is_active=True).select_related('user')
         return standard_response(
             success=True,
             message="Active profiles retrieved successfully.",
-            data=serializer.data
+            data=self.paginated_data(active_profiles)
         )
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(UserScopedMixin, PaginatedListMixin, viewsets.ModelViewSet):
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, IndexedOrderingFilter]
+    filterset_class = TransactionFilter
+    ordering_fields = ['date', 'id']
 
     @action(detail=True, methods=['post'])
-    def approve(self, request, pk=None):
+    def approve(self, request, pk=None, user_pk=None):
         transaction = self.get_object()
         user = transaction.user
         try:
@@ -114,7 +203,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=False, methods=['post'])
-    def bulk_create(self, request):
+    def bulk_create(self, request, user_pk=None):
         serializer = self.get_serializer(data=request.data, many=True)
         serializer.is_valid(raise_exception=True)
         self.perform_bulk_create(serializer)
@@ -125,74 +214,110 @@ class TransactionViewSet(viewsets.ModelViewSet):
         )
 
     def perform_bulk_create(self, serializer):
+        self.check_scope_user(serializer.validated_data)
         transactions = [Transaction(**item) for item in serializer.validated_data]
-        for transaction in transactions:
-            try:
-                profile = transaction.user.profile
-            except Profile.DoesNotExist:
-                raise NotFound(detail=f"Profile does not exist for the user {transaction.user.username}.")
-        Transaction.objects.bulk_create(transactions)
+        users = {transaction.user_id: transaction.user for transaction in transactions}
+        with_profile = set(Profile.objects.filter(user_id__in=list(users)).values_list('user_id', flat=True))
+        missing = sorted(user.username for user_id, user in users.items() if user_id not in with_profile)
+        if missing:
+            raise NotFound(detail=f"Profile does not exist for the users {', '.join(missing)}.")
+        ingest_transactions(transactions, batch_size=self.get_bulk_batch_size())
+
+    def get_bulk_batch_size(self):
+        default = getattr(settings, 'TRANSACTION_BULK_BATCH_SIZE', 1000)
+        try:
+            batch_size = int(self.request.query_params.get('batch_size', default))
+        except ValueError:
+            raise ValidationError({'batch_size': "A valid integer is required."})
+        return max(1, min(batch_size, getattr(settings, 'TRANSACTION_BULK_MAX_BATCH_SIZE', 5000)))
 
     @action(detail=False, methods=['put'])
-    def bulk_update(self, request):
+    def bulk_update(self, request, user_pk=None):
+        if not isinstance(request.data, list):
+            raise ValidationError({'non_field_errors': ["Expected a list of transactions."]})
+        ids = self.get_bulk_update_ids(request.data)
         serializer = self.get_serializer(data=request.data, many=True)
         serializer.is_valid(raise_exception=True)
-        self.perform_bulk_update(serializer)
+        transactions = self.perform_bulk_update(serializer, ids)
         return standard_response(
-            {
-                "success": True,
-                "message": "Bulk transactions updated successfully.",
-                "data": serializer.data
-            }
+            success=True,
+            message="Bulk transactions updated successfully.",
+            data=self.get_serializer(transactions, many=True).data
         )
 
-    def perform_bulk_update(self, serializer):
-        for item in serializer.validated_data:
-            transaction_id = item.get('id')
+    def get_bulk_update_ids(self, items):
+        ids = []
+        for index, item in enumerate(items):
             try:
-                transaction = Transaction.objects.get(pk=transaction_id)
-                Transaction.objects.filter(pk=transaction_id).update(**item)
-            except Transaction.DoesNotExist:
-                raise NotFound(detail=f"Transaction with ID {transaction_id} does not exist.")
+                ids.append(int(item['id']))
+            except (KeyError, TypeError, ValueError):
+                raise ValidationError({'id': [f"Item {index} must include a valid transaction id."]})
+        duplicates = sorted(pk for pk, count in Counter(ids).items() if count > 1)
+        if duplicates:
+            raise ValidationError({'id': [f"Duplicate transaction ids: {', '.join(map(str, duplicates))}."]})
+        return ids
+
+    def perform_bulk_update(self, serializer, ids):
+        self.check_scope_user(serializer.validated_data)
+        changes = dict(zip(ids, serializer.validated_data))
+        # Other users' ids are reported as missing, like ids that don't exist
+        transactions, missing = update_transactions(changes, batch_size=self.get_bulk_batch_size(), user_id=self.get_scope_user_id())
+        if missing:
+            raise NotFound(detail=f"Transactions with IDs {', '.join(map(str, missing))} do not exist.")
+        return transactions
 
     @action(detail=False, methods=['get'])
-    def filter_by_date(self, request):
+    def filter_by_date(self, request, user_pk=None):
         start_date = request.query_params.get('start_date', None)
         end_date = request.query_params.get('end_date', None)
-        transactions = self.queryset.all()
+        transactions = self.filter_queryset(self.get_queryset())
 
         if start_date:
             transactions = transactions.filter(date__gte=start_date)
         if end_date:
             transactions = transactions.filter(date__lte=end_date)
 
-        serializer = self.get_serializer(transactions, many=True)
         return standard_response(
             success=True,
             message="Transactions filtered by date successfully.",
-            data=serializer.data
+            data=self.paginated_data(transactions)
         )
 
     @action(detail=False, methods=['get'])
-    def analytics(self, request):
-        transactions = self.queryset.values('date', 'amount')
-        data = [{'date': t['date'], 'amount': t['amount']} for t in transactions]
-        bar_chart = generate_bar_chart(data, 'Transactions Over Time', 'date', 'amount')
-        line_chart = generate_line_chart(data, 'Transactions Over Time', 'date', 'amount')
+    @replica_safe
+    def analytics(self, request, user_pk=None):
+        data = cached_for_user(
+            'transaction-analytics',
+            self.get_scope_user_id() or request.query_params.get('user'),
+            request.query_params,
+            lambda: build_analytics(
+                request.query_params,
+                self.scope_queryset(DailyTransactionRollup.objects.all()),
+                'transaction_type',
+                'Transactions Over Time',
+                date_field='day',
+                value_field='total_amount',
+                count_field='count',
+            ),
+        )
+        image_format, kind = render_params(request.query_params)
+        if image_format:
+            return series_chart_response(request, data['series'], 'Transactions Over Time', image_format, kind)
         return standard_response(
             success=True,
             message="Transaction analytics retrieved successfully.",
-            data={'bar_chart': bar_chart, 'line_chart': line_chart}
+            data=data
         )
 
    
     @action(detail=False, methods=['get', 'post'], permission_classes=[AllowAny])
-    def generate_statement(self, request):
+    @replica_safe
+    def generate_statement(self, request, user_pk=None):
         start_date = request.data.get('start_date') or request.query_params.get('start_date')
         end_date = request.data.get('end_date') or request.query_params.get('end_date')
 
         # Allow filtering by date range for all transactions
-        transactions = self.queryset.all()
+        transactions = self.get_queryset()
         if start_date:
             transactions = transactions.filter(date__gte=start_date)
         if end_date:
@@ -208,17 +333,18 @@ class TransactionViewSet(viewsets.ModelViewSet):
             {
                 "success": True,
                 "message": "Account statement generated successfully.",
-                "data": TransactionSerializer(transactions, many=True).data
+                "data": self.paginated_data(transactions)
             }
         )
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
-    def export_csv(self, request):
+    @replica_safe
+    def export_csv(self, request, user_pk=None):
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
 
         # Filter transactions by date range if provided
-        transactions = self.queryset.all()
+        transactions = self.get_queryset()
         if start_date:
             transactions = transactions.filter(date__gte=start_date)
         if end_date:
@@ -230,27 +356,20 @@ class TransactionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Create the CSV response
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="transactions.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['Date', 'Amount', 'Transaction Type', 'Description'])
-
-        for transaction in transactions:
-            writer.writerow([transaction.date, transaction.amount, transaction.transaction_type, transaction.description])
-
-        return response
+        # Stream the CSV so memory stays flat and the first rows go out immediately
+        rows = iterate_values(transactions, ['date', 'amount', 'transaction_type', 'description'])
+        return stream_csv(['Date', 'Amount', 'Transaction Type', 'Description'], rows, 'transactions.csv')
 
 
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
-    def export_pdf(self, request):
+    @replica_safe
+    def export_pdf(self, request, user_pk=None):
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
 
         # Ensure the date range is handled, default to the whole dataset if not specified
-        transactions = self.queryset.all()
+        transactions = self.get_queryset()
         if start_date:
             transactions = transactions.filter(date__gte=start_date)
         if end_date:
@@ -262,119 +381,173 @@ class TransactionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Generate the PDF
-        buffer = BytesIO()
-        pdf = canvas.Canvas(buffer, pagesize=letter)
-        pdf.drawString(100, 750, "Transaction Statement")
-        pdf.drawString(100, 735, f"From {start_date} to {end_date}")
-
-        y = 700
-        pdf.drawString(100, y, "Date")
-        pdf.drawString(200, y, "Amount")
-        pdf.drawString(300, y, "Type")
-        pdf.drawString(400, y, "Description")
-
-        for transaction in transactions:
-            y -= 15
-            pdf.drawString(100, y, str(transaction.date))
-            pdf.drawString(200, y, str(transaction.amount))
-            pdf.drawString(300, y, transaction.transaction_type)
-            pdf.drawString(400, y, transaction.description)
-
-        pdf.showPage()
-        pdf.save()
-        buffer.seek(0)
-
-        response = HttpResponse(buffer, content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename="transactions.pdf"'
-        return response
+        return statement_pdf_response(
+            transactions,
+            "Transaction Statement",
+            f"From {start_date} to {end_date}",
+            'transactions.pdf',
+            'transactions-export',
+            user_id=self.get_scope_user_id(),
+            start_date=start_date,
+            end_date=end_date,
+        )
 
 class InvestmentViewSet(CustomBaseViewSet):
     queryset = Investment.objects.all()
     serializer_class = InvestmentSerializer
+    filterset_class = InvestmentFilter
+    ordering_fields = ['date', 'id']
 
     @action(detail=False, methods=['get'])
-    def filter_by_date(self, request):
+    def filter_by_date(self, request, user_pk=None):
         start_date = request.query_params.get('start_date', None)
         end_date = request.query_params.get('end_date', None)
-        investments = self.queryset.all()
+        investments = self.get_queryset()
 
         if start_date:
             investments = investments.filter(date__gte=start_date)
         if end_date:
             investments = investments.filter(date__lte=end_date)
 
-        serializer = self.get_serializer(investments, many=True)
         return standard_response(
             success=True,
             message="Investments filtered by date successfully.",
-            data=serializer.data
+            data=self.paginated_data(investments)
         )
 
     @action(detail=False, methods=['get'])
-    def analytics(self, request):
-        investments = self.queryset.values('date', 'amount')
-        data = [{'date': i['date'], 'amount': i['amount']} for i in investments]
-        bar_chart = generate_bar_chart(data, 'Investments Over Time', 'date', 'amount')
-        line_chart = generate_line_chart(data, 'Investments Over Time', 'date', 'amount')
+    @replica_safe
+    def analytics(self, request, user_pk=None):
+        data = build_analytics(request.query_params, self.get_queryset(), 'investment_type', 'Investments Over Time')
+        image_format, kind = render_params(request.query_params)
+        if image_format:
+            return series_chart_response(request, data['series'], 'Investments Over Time', image_format, kind)
         return standard_response(
             success=True,
             message="Investment analytics retrieved successfully.",
-            data={'bar_chart': bar_chart, 'line_chart': line_chart}
+            data=data
         )
 
 class BudgetViewSet(CustomBaseViewSet):
     queryset = Budget.objects.all()
     serializer_class = BudgetSerializer
+    filterset_class = BudgetFilter
+    ordering_fields = ['start_date', 'id']
+    cursor_field = 'start_date'
 
     @action(detail=False, methods=['get'])
-    def analytics(self, request):
-        total_budget = self.queryset.aggregate(total_amount=Sum('amount'))['total_amount']
-        budget_by_category = self.queryset.values('category').annotate(total_amount=Sum('amount'))
-
+    @replica_safe
+    def analytics(self, request, user_pk=None):
+        data = cached_for_user('budget-analytics', self.get_scope_user_id(), {}, self.compute_analytics)
+        # ?render=png|svg draws a pie of spending (?chart=spent) or budgeted amounts (?chart=budget) per category
+        image_format, kind = render_params(request.query_params, kinds=('spent', 'budget'))
+        if image_format and kind == 'budget':
+            points = [(row['category'], row['total_amount']) for row in data['budget_by_category']]
+            return chart_response(request, 'pie', points, 'Budget by Category', image_format)
+        if image_format:
+            points = [(row['category'], row['total']) for row in data['spent_by_category']]
+            return chart_response(request, 'pie', points, 'Spending by Category', image_format)
         return standard_response(
             success=True,
             message="Budget analytics retrieved successfully.",
-            data={
-                "total_budget": total_budget,
-                "budget_by_category": budget_by_category
-            }
+            data=data
+        )
+
+    @action(detail=False, methods=['get'])
+    @replica_safe
+    def utilization(self, request, user_pk=None):
+        budgets = self.get_queryset()
+        if request.query_params.get('category'):
+            budgets = budgets.filter(category=request.query_params['category'])
+        on_date = request.query_params.get('on')
+        if on_date or request.query_params.get('active', '').lower() in ('1', 'true', 'yes'):
+            day = parse_date(on_date) if on_date else timezone.localdate()
+            if day is None:
+                raise ValidationError({'on': ["Must be a valid ISO date."]})
+            budgets = budgets.filter(start_date__lte=day, end_date__gte=day)
+
+        # Spending per budget is a correlated SUM over the daily expense rollups for the same user and
+        # category inside the budget window, so every budget is computed in one SQL statement.
+        spent = (
+            DailyExpenseRollup.objects.filter(
+                user_id=OuterRef('user_id'),
+                category=OuterRef('category'),
+                day__gte=OuterRef('start_date'),
+                day__lte=OuterRef('end_date'),
+            )
+            .order_by()
+            .values('user_id')
+            .annotate(total=Sum('total_amount'))
+            .values('total')
+        )
+        rows = budgets.annotate(
+            spent=Coalesce(Subquery(spent), Value(0), output_field=DecimalField(max_digits=14, decimal_places=2))
+        ).values('id', 'user', 'category', 'amount', 'start_date', 'end_date', 'spent')
+
+        page = self.paginate_queryset(rows)
+        results = [self.utilization_row(row) for row in (page if page is not None else rows)]
+        return standard_response(
+            success=True,
+            message="Budget utilization retrieved successfully.",
+            data=self.get_paginated_response(results).data if page is not None else results
         )
 
+    def utilization_row(self, row):
+        amount, spent = Decimal(row['amount']), Decimal(row['spent'])
+        row['spent'] = spent
+        row['remaining'] = amount - spent
+        row['percent_used'] = round(spent * 100 / amount, 2) if amount else None
+        return row
+
+    def compute_analytics(self):
+        queryset = self.get_queryset()
+        total_budget = queryset.aggregate(total_amount=Sum('amount'))['total_amount']
+        budget_by_category = list(queryset.values('category').annotate(total_amount=Sum('amount')).order_by('category'))
+        spent_by_category = rollup_totals(self.scope_queryset(DailyExpenseRollup.objects.all()), 'category')
+        return {
+            "total_budget": total_budget,
+            "budget_by_category": budget_by_category,
+            "spent_by_category": spent_by_category
+        }
+
 class ExpenseViewSet(CustomBaseViewSet):
     queryset = Expense.objects.all()
     serializer_class = ExpenseSerializer
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, IndexedOrderingFilter]
+    filterset_class = ExpenseFilter
+    ordering_fields = ['date', 'id']
 
     @action(detail=False, methods=['get'])
-    def filter_by_date(self, request):
+    def filter_by_date(self, request, user_pk=None):
         start_date = request.query_params.get('start_date', None)
         end_date = request.query_params.get('end_date', None)
-        expenses = self.queryset.all()
+        expenses = self.filter_queryset(self.get_queryset())
 
         if start_date:
             expenses = expenses.filter(date__gte=start_date)
         if end_date:
             expenses = expenses.filter(date__lte=end_date)
 
-        serializer = self.get_serializer(expenses, many=True)
         return standard_response(
             success=True,
             message="Expenses filtered by date successfully.",
-            data=serializer.data
+            data=self.paginated_data(expenses)
         )
 
 class SavingsGoalViewSet(CustomBaseViewSet):
     queryset = SavingsGoal.objects.all()
     serializer_class = SavingsGoalSerializer
+    filterset_class = SavingsGoalFilter
+    ordering_fields = ['start_date', 'id']
+    cursor_field = 'start_date'
 
     @action(detail=False, methods=['get'])
-    def active_goals(self, request):
-        active_goals = self.queryset.filter(current_amount__lt=F('target_amount'))
-        serializer = self.get_serializer(active_goals, many=True)
+    def active_goals(self, request, user_pk=None):
+        active_goals = self.get_queryset().filter(current_amount__lt=F('target_amount'))
         return standard_response(
             success=True,
             message="Active savings goals retrieved successfully.",
-            data=serializer.data
+            data=self.paginated_data(active_goals)
         )
 
 class FinancialAdviceView(APIView):
@@ -402,21 +575,19 @@ class BalanceView(APIView):
         user = request.user
 
         if user.is_authenticated:
-            try:
-                profile = user.profile
-            except Profile.DoesNotExist:
+            # Balance is maintained on the profile by Transaction.save() and reconcile_balances
+            total_balance = cached_for_user(
+                'balance',
+                user.pk,
+                {},
+                lambda: Profile.objects.filter(user_id=user.pk).values_list('balance', flat=True).first(),
+            )
+            if total_balance is None:
                 return Response(
                     {"detail": "Profile does not exist for the user."},
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            # Calculate total balance for authenticated users
-            total_balance = (
-                Transaction.objects.filter(user=user, transaction_type=Transaction.DEPOSIT).aggregate(total=Sum('amount'))['total'] or 0
-            ) - (
-                Transaction.objects.filter(user=user, transaction_type=Transaction.WITHDRAWAL).aggregate(total=Sum('amount'))['total'] or 0
-            )
-
             return Response(
                 {
                     "success": True,
@@ -427,13 +598,21 @@ class BalanceView(APIView):
         else:
             # Provide a generic response for anonymous users
             return standard_response(
-                {
-                    "success": True,
-                    "message": "Current balance information is not available for anonymous users.",
-                    "data": {'balance': 0}  # Default value or empty data
-                }
+                success=True,
+                message="Current balance information is not available for anonymous users.",
+                data={'balance': 0}  # Default value or empty data
             )
+class StatementContentNegotiation(DefaultContentNegotiation):
+    # ?format=csv|pdf picks the statement file type, which DRF would otherwise treat as a renderer override and 404
+    def select_renderer(self, request, renderers, format_suffix=None):
+        if request.query_params.get(self.settings.URL_FORMAT_OVERRIDE) in ('csv', 'pdf'):
+            return renderers[0], renderers[0].media_type
+        return super().select_renderer(request, renderers, format_suffix)
+
 class StatementView(APIView):
+    content_negotiation_class = StatementContentNegotiation
+    replica_safe = True
+
     def get(self, request):
         # Access query parameters safely
         start_date_str = request.query_params.get('start_date')
@@ -464,53 +643,67 @@ class StatementView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        # Fetch transactions within the date range
-        transactions = Transaction.objects.filter(user=user, date__range=(start_date, end_date))
+        # Fetch transactions within the date range, end date inclusive
+        transactions = Transaction.objects.filter(user=user, date__gte=start_date, date__lt=end_date + timedelta(days=1))
 
         # Determine response format
         response_format = request.query_params.get('format', 'json')
         if response_format == 'csv':
             return self.generate_csv_response(transactions)
         elif response_format == 'pdf':
-            return self.generate_pdf_response(transactions)
-
-        # Default JSON response
-        serializer = TransactionSerializer(transactions, many=True)
+            return self.generate_pdf_response(transactions, user, start_date, end_date)
+
+        # Default JSON response, cached until the user's next write
+        data = cached_for_user(
+            'statement',
+            user.pk,
+            {'start_date': start_date, 'end_date': end_date},
+            lambda: TransactionSerializer(transactions, many=True).data,
+        )
         return standard_response(
             success=True,
             message="Account statement retrieved successfully.",
-            data=serializer.data
+            data=data
         )
 
     def generate_csv_response(self, transactions):
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['Date', 'Transaction Type', 'Amount', 'Description'])
-
-        for transaction in transactions:
-            writer.writerow([transaction.date, transaction.get_transaction_type_display(), transaction.amount, transaction.description])
+        type_labels = dict(Transaction.TRANSACTION_TYPES)
+        rows = (
+            (date, type_labels.get(transaction_type, transaction_type), amount, description)
+            for date, transaction_type, amount, description in iterate_values(transactions, ['date', 'transaction_type', 'amount', 'description'])
+        )
+        return stream_csv(['Date', 'Transaction Type', 'Amount', 'Description'], rows, 'statement.csv')
 
-        output.seek(0)
-        response = HttpResponse(output, content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename=statement.csv'
-        return response
+    def generate_pdf_response(self, transactions, user, start_date, end_date):
+        totals = rollup_totals(
+            DailyTransactionRollup.objects.filter(user=user, day__gte=start_date, day__lte=end_date),
+            'transaction_type',
+        )
+        type_labels = dict(Transaction.TRANSACTION_TYPES)
+        summary = "   ".join(f"{type_labels.get(row['transaction_type'], row['transaction_type'])}: {row['total']} ({row['count']})" for row in totals)
+        return statement_pdf_response(
+            transactions,
+            "Account Statement",
+            f"From {start_date} to {end_date}",
+            'statement.pdf',
+            'statement',
+            user_id=user.pk,
+            start_date=start_date,
+            end_date=end_date,
+            summary=summary,
+        )
 
-    def generate_pdf_response(self, transactions):
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer)
 
-        p.drawString(100, 800, "Account Statement")
-        y = 750
-        for transaction in transactions:
-            p.drawString(100, y, f"{transaction.date} - {transaction.get_transaction_type_display()} - {transaction.amount} - {transaction.description}")
-            y -= 20
+METRICS_DEFAULT_ALLOWED_IPS = ('127.0.0.1', '::1')
 
-        p.showPage()
-        p.save()
+def metrics(request):
+    # Prometheus scrape endpoint for the histograms recorded by core.middleware.PerformanceMiddleware
+    # Loopback only unless METRICS_ALLOWED_IPS lists the scrapers; '*' opens it to everyone
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', None)
+    if allowed is None:
+        allowed = METRICS_DEFAULT_ALLOWED_IPS
+    if allowed != '*' and request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponse(status=403)
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
-        pdf = buffer.getvalue()
-        buffer.close()
-        
-        response = HttpResponse(pdf, content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename=statement.pdf'
-        return response
\ No newline at end of file
+metrics.exclude_from_metrics = True
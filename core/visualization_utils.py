@@ -1,20 +1,204 @@
-import matplotlib.pyplot as plt
-import pandas as pd
-import plotly.express as px
-from io import BytesIO
-import base64
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+# pandas and plotly are imported on first use so API workers that never chart don't load them at boot
+
+IMAGE_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ChartUnavailable(APIException):
+    # Sent with a Retry-After header; the same endpoint without ?render= still answers with the JSON data
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The chart renderer is busy. Try again shortly, or request the data without ?render=."
+    default_code = 'chart_unavailable'
+
+    def __init__(self, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = getattr(settings, 'CHART_RETRY_AFTER', 5)
+
 
 def generate_bar_chart(data, title, x_label, y_label):
-    df = pd.DataFrame(data)
+    import pandas as pd
+    import plotly.express as px
+    df = pd.DataFrame(data, columns=[x_label, y_label])
     fig = px.bar(df, x=x_label, y=y_label, title=title)
     return fig.to_json()
 
 def generate_pie_chart(data, title):
+    import pandas as pd
+    import plotly.express as px
     df = pd.DataFrame(data)
     fig = px.pie(df, values='value', names='label', title=title)
     return fig.to_json()
 
 def generate_line_chart(data, title, x_label, y_label):
-    df = pd.DataFrame(data)
+    import pandas as pd
+    import plotly.express as px
+    df = pd.DataFrame(data, columns=[x_label, y_label])
     fig = px.line(df, x=x_label, y=y_label, title=title)
     return fig.to_json()
+
+
+def render_image(kind, labels, values, title, x_label, y_label, image_format):
+    # Runs inside a pool worker: only plain lists and strings cross the process boundary
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from io import BytesIO
+
+    fig, ax = plt.subplots(figsize=(6, 4), dpi=100)
+    try:
+        if kind == 'pie':
+            if any(values):
+                ax.pie(values, labels=labels, autopct='%1.0f%%')
+            ax.axis('equal')
+        else:
+            if kind == 'bar':
+                ax.bar(labels, values)
+            else:
+                ax.plot(labels, values, marker='o')
+            ax.set_xlabel(x_label)
+            ax.set_ylabel(y_label)
+            ax.tick_params(axis='x', labelrotation=45, labelsize=8)
+        ax.set_title(title)
+        fig.tight_layout()
+        buffer = BytesIO()
+        fig.savefig(buffer, format=image_format)
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def get_render_pool():
+    # One bounded pool per process; matplotlib runs in the workers so request threads only wait on a future.
+    # Workers are spawned rather than forked so they don't inherit DB connections or locks held by other threads.
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=getattr(settings, 'CHART_RENDER_WORKERS', 2),
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+    return _pool
+
+
+def _reset_render_pool(pool):
+    # Only forget `pool` if another request hasn't already replaced it
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def _render_failed(pool, job, exc):
+    # Maps a failed render to ChartUnavailable, cleaning up the pool first
+    if isinstance(exc, BrokenProcessPool):
+        # A worker died (e.g. OOM-killed); start a fresh pool on the next request
+        _reset_render_pool(pool)
+    elif job is not None and not job.cancel():
+        # Timed out while running: a running job can't be cancelled, so stop this pool's workers rather than
+        # leave one stuck on it, and start a fresh pool on the next request
+        _reset_render_pool(pool)
+        # (ProcessPoolExecutor has no public way to stop its workers before Python 3.14)
+        processes = list((getattr(pool, '_processes', None) or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+    return ChartUnavailable()
+
+
+def chart_digest(kind, labels, values, title, x_label, y_label, image_format):
+    # Content hash of everything that affects the image, so identical series share one cached render
+    payload = json.dumps([kind, labels, values, title, x_label, y_label, image_format], separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def chart_args(kind, points, title, image_format, x_label, y_label):
+    labels = [str(label) for label, value in points]
+    values = [float(value or 0) for label, value in points]
+    args = (kind, labels, values, title, x_label, y_label, image_format)
+    return args, chart_digest(*args)
+
+
+def chart_cache():
+    return caches[getattr(settings, 'CHART_CACHE_ALIAS', 'default')]
+
+
+def render_chart(kind, points, title, image_format='png', x_label='', y_label=''):
+    args, digest = chart_args(kind, points, title, image_format, x_label, y_label)
+    cache = chart_cache()
+    key = f"chart:{digest}"
+    image = cache.get(key)
+    if image is None:
+        if getattr(settings, 'CHART_RENDER_WORKERS', 2):
+            pool, job = get_render_pool(), None
+            try:
+                job = pool.submit(render_image, *args)
+                image = job.result(timeout=getattr(settings, 'CHART_RENDER_TIMEOUT', 30))
+            except (concurrent.futures.TimeoutError, BrokenProcessPool) as exc:
+                raise _render_failed(pool, job, exc)
+            except RuntimeError:
+                # The pool was shut down by another request's timeout between get_render_pool() and submit()
+                raise ChartUnavailable()
+        else:
+            image = render_image(*args)
+        cache.set(key, image, getattr(settings, 'CHART_CACHE_TIMEOUT', 60 * 60 * 24))
+    return digest, image
+
+
+async def arender_chart(kind, points, title, image_format='png', x_label='', y_label=''):
+    # Same cache and pool as render_chart, but the event loop awaits the worker's future instead of blocking
+    args, digest = chart_args(kind, points, title, image_format, x_label, y_label)
+    cache = chart_cache()
+    key = f"chart:{digest}"
+    image = await cache.aget(key)
+    if image is None:
+        if getattr(settings, 'CHART_RENDER_WORKERS', 2):
+            pool, job = get_render_pool(), None
+            try:
+                job = pool.submit(render_image, *args)
+                image = await asyncio.wait_for(asyncio.wrap_future(job), getattr(settings, 'CHART_RENDER_TIMEOUT', 30))
+            except (asyncio.TimeoutError, BrokenProcessPool) as exc:
+                raise _render_failed(pool, job, exc)
+            except RuntimeError:
+                raise ChartUnavailable()
+        else:
+            image = await sync_to_async(render_image, thread_sensitive=False)(*args)
+        await cache.aset(key, image, getattr(settings, 'CHART_CACHE_TIMEOUT', 60 * 60 * 24))
+    return digest, image
+
+
+def image_response(request, digest, image, image_format):
+    etag = f'"{digest}"'
+    if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+        return HttpResponseNotModified()
+    response = HttpResponse(image, content_type=IMAGE_FORMATS[image_format])
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=300'
+    return response
+
+
+def chart_response(request, kind, points, title, image_format='png', x_label='', y_label=''):
+    digest, image = render_chart(kind, points, title, image_format, x_label, y_label)
+    return image_response(request, digest, image, image_format)
+
+
+async def achart_response(request, kind, points, title, image_format='png', x_label='', y_label=''):
+    digest, image = await arender_chart(kind, points, title, image_format, x_label, y_label)
+    return image_response(request, digest, image, image_format)